@@ -0,0 +1,219 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from termcolor import colored
+
+from . import metrics
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+"""
+Pool of Ollama (OpenAI-compatible) backends shared by the chat provider and the RAG embedder and
+generator. Requests go to the healthy backend with the fewest outstanding requests, each backend
+has a concurrency cap, and a background probe ejects backends that fail or answer too slowly and
+readmits them once they recover. Backends are listed in OLLAMA_BACKENDS, e.g.
+
+    OLLAMA_BACKENDS=http://gpu-1:11434|8,http://gpu-2:11434|4
+
+where the optional `|n` overrides OLLAMA_BACKEND_MAX_CONCURRENCY for that backend. Every backend
+must serve the same models, since embeddings from different models cannot be mixed.
+"""
+
+OLLAMA_BACKENDS = os.environ.get("OLLAMA_BACKENDS", "")
+OLLAMA_BACKEND_MAX_CONCURRENCY = int(os.environ.get("OLLAMA_BACKEND_MAX_CONCURRENCY", 8))
+BACKEND_HEALTH_INTERVAL = float(os.environ.get("BACKEND_HEALTH_INTERVAL", 10))
+BACKEND_PROBE_TIMEOUT = float(os.environ.get("BACKEND_PROBE_TIMEOUT", 2))
+BACKEND_SLOW_SECONDS = float(os.environ.get("BACKEND_SLOW_SECONDS", 1))
+BACKEND_EJECT_AFTER_FAILURES = int(os.environ.get("BACKEND_EJECT_AFTER_FAILURES", 3))
+BACKEND_EJECT_SECONDS = float(os.environ.get("BACKEND_EJECT_SECONDS", 30))
+LATENCY_SMOOTHING = 0.2
+
+
+class Backend:
+    def __init__(self, url: str, max_concurrency: int = OLLAMA_BACKEND_MAX_CONCURRENCY):
+        self.url = url.rstrip("/")
+        self.name = urlparse(self.url).netloc or self.url
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.latency = 0.0
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "max_concurrency": self.max_concurrency,
+            "ejected": self.ejected,
+            "failures": self.failures,
+            "latency": self.latency,
+        }
+
+
+def parse_backends(spec: str, default_url: str) -> List[Backend]:
+    backends = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        url, _, limit = entry.partition("|")
+        backends.append(Backend(url, int(limit) if limit else OLLAMA_BACKEND_MAX_CONCURRENCY))
+    return backends or [Backend(default_url)]
+
+
+class BackendPool:
+    def __init__(
+        self,
+        backends: List[Backend],
+        health_interval: float = BACKEND_HEALTH_INTERVAL,
+        failure_types: Tuple[type, ...] = (httpx.TransportError, ConnectionError, TimeoutError),
+    ):
+        self.backends = backends
+        self.health_interval = health_interval
+        self.failure_types = failure_types
+        self._condition = threading.Condition()
+        self._probe_thread = None
+
+    def start_health_checks(self):
+        # One backend has nowhere to fail over to, so probing it would only add traffic.
+        if self._probe_thread is None and len(self.backends) > 1 and self.health_interval > 0:
+            self._probe_thread = threading.Thread(target=self._probe_loop, name="backend-health", daemon=True)
+            self._probe_thread.start()
+
+    def _pick(self, exclude=()) -> Optional[Backend]:
+        # Backends that just failed this request are only used again if nothing else exists.
+        preferred = [backend for backend in self.backends if backend not in exclude] or self.backends
+        candidates = [backend for backend in preferred if backend.outstanding < backend.max_concurrency]
+        healthy = [backend for backend in candidates if not backend.ejected]
+        if not healthy and not any(not backend.ejected for backend in preferred):
+            # Everything is ejected: keep serving from whichever backend is due back first.
+            healthy = sorted(candidates, key=lambda backend: backend.ejected_until)[:1]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda backend: (backend.outstanding / backend.max_concurrency, backend.latency))
+
+    def checkout(self, timeout: Optional[float] = None, exclude=()) -> Backend:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                backend = self._pick(exclude)
+                if backend is not None:
+                    backend.outstanding += 1
+                    metrics.incr(f"backend.{backend.name}.requests")
+                    return backend
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Every Ollama backend is at its concurrency limit")
+                metrics.incr("backend.waits")
+                self._condition.wait(remaining)
+
+    def release(self, backend: Backend, elapsed: float, ok: bool = True):
+        with self._condition:
+            backend.outstanding -= 1
+            if ok:
+                backend.failures = 0
+            else:
+                self._record_failure(backend)
+            metrics.observe(f"backend.{backend.name}", elapsed)
+            self._condition.notify()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None, exclude=()):
+        backend = self.checkout(timeout, exclude)
+        started, ok = time.perf_counter(), True
+        try:
+            yield backend
+        except self.failure_types:
+            # Only transport-level errors count against the backend, not errors in the caller's code.
+            ok = False
+            raise
+        finally:
+            self.release(backend, time.perf_counter() - started, ok)
+
+    @asynccontextmanager
+    async def aacquire(self, timeout: Optional[float] = None, exclude=()):
+        backend = await asyncio.to_thread(self.checkout, timeout, exclude)
+        started, ok = time.perf_counter(), True
+        try:
+            yield backend
+        except self.failure_types:
+            ok = False
+            raise
+        finally:
+            self.release(backend, time.perf_counter() - started, ok)
+
+    def run(self, function, attempts: int = 2, can_retry=None, exclude=()):
+        # Calls `function(backend)`, retrying a connection failure on a different backend unless
+        # `can_retry()` says the failed attempt already had visible effects.
+        failed = list(exclude)
+        for attempt in range(min(attempts, len(self.backends))):
+            try:
+                with self.acquire(exclude=failed) as backend:
+                    return function(backend)
+            except self.failure_types:
+                if attempt == min(attempts, len(self.backends)) - 1 or (can_retry and not can_retry()):
+                    raise
+                failed.append(backend)
+
+    async def arun(self, function, attempts: int = 2):
+        failed = []
+        for attempt in range(min(attempts, len(self.backends))):
+            try:
+                async with self.aacquire(exclude=failed) as backend:
+                    return await function(backend)
+            except self.failure_types:
+                if attempt == min(attempts, len(self.backends)) - 1:
+                    raise
+                failed.append(backend)
+
+    def _record_failure(self, backend: Backend):
+        backend.failures += 1
+        if backend.failures >= BACKEND_EJECT_AFTER_FAILURES and not backend.ejected:
+            self._eject(backend, f"{backend.failures} consecutive failures")
+
+    def _eject(self, backend: Backend, reason: str):
+        backend.ejected_until = time.monotonic() + BACKEND_EJECT_SECONDS
+        metrics.incr(f"backend.{backend.name}.ejections")
+        logger.error(colored(f"Ejecting Ollama backend {backend.url}: {reason}", "red"))
+
+    def probe(self, backend: Backend):
+        started = time.perf_counter()
+        try:
+            httpx.get(f"{backend.url}/api/tags", timeout=BACKEND_PROBE_TIMEOUT).raise_for_status()
+        except httpx.HTTPError as e:
+            with self._condition:
+                backend.failures = max(backend.failures, BACKEND_EJECT_AFTER_FAILURES)
+                if not backend.ejected:
+                    self._eject(backend, f"health probe failed ({e})")
+            return
+        elapsed = time.perf_counter() - started
+        with self._condition:
+            smoothed = LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * backend.latency
+            backend.latency = smoothed if backend.latency else elapsed
+            if backend.latency > BACKEND_SLOW_SECONDS:
+                if not backend.ejected:
+                    self._eject(backend, f"probe latency {backend.latency:.2f}s")
+            elif backend.ejected or backend.failures:
+                backend.failures = 0
+                backend.ejected_until = 0.0
+                print(colored(f"Ollama backend {backend.url} is healthy again", "green"))
+                self._condition.notify_all()
+
+    def _probe_loop(self):
+        while True:
+            for backend in self.backends:
+                self.probe(backend)
+            time.sleep(self.health_interval)
+
+    def status(self) -> List[dict]:
+        with self._condition:
+            return [backend.status() for backend in self.backends]
@@ -0,0 +1,183 @@
+import os
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union
+
+import httpx
+import ollama
+import openai
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+from . import metrics
+from .backend_pool import OLLAMA_BACKENDS, BackendPool, parse_backends
+
+"""
+Registry of long-lived clients for the Ollama servers. Every chat, embedding and
+OpenAI-compatible client shares pooled keep-alive HTTP connections instead of being rebuilt
+(and reconnecting to Ollama) on each request. Connection reuse is counted in `ai.metrics`.
+Without an explicit `base_url`, chat models and embeddings are spread over the backend pool.
+"""
+
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+OLLAMA_POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", 10))
+OLLAMA_KEEPALIVE_CONNECTIONS = int(os.environ.get("OLLAMA_KEEPALIVE_CONNECTIONS", OLLAMA_POOL_SIZE))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY", 60))
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", 5))
+OLLAMA_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", 120))
+# Seconds Ollama keeps a model loaded after a request from this bot (-1 keeps it loaded forever).
+OLLAMA_KEEP_ALIVE = int(os.environ.get("OLLAMA_KEEP_ALIVE", 1800))
+
+# Transport and timeout errors: the backend may be fine on the next attempt, unlike e.g. a missing model.
+TRANSIENT_ERRORS = (
+    httpx.TransportError,
+    ConnectionError,
+    TimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_lock = threading.Lock()
+_clients = {}
+_backend_pool = None
+_seen_connections = weakref.WeakSet()
+
+
+def _record_connection(response: httpx.Response):
+    metrics.incr("http.requests")
+    stream = response.extensions.get("network_stream")
+    if stream is None:
+        return
+    try:
+        if stream in _seen_connections:
+            metrics.incr("http.connections_reused")
+            return
+        _seen_connections.add(stream)
+    except TypeError:
+        pass
+    metrics.incr("http.connections_opened")
+
+
+async def _arecord_connection(response: httpx.Response):
+    _record_connection(response)
+
+
+def http_client_options(is_async: bool = False) -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=OLLAMA_POOL_SIZE,
+            max_keepalive_connections=OLLAMA_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(OLLAMA_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT),
+        "event_hooks": {"response": [_arecord_connection if is_async else _record_connection]},
+    }
+
+
+def _get_or_create(key, factory):
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = factory()
+            metrics.incr("clients.created")
+        return client
+
+
+def get_backend_pool() -> BackendPool:
+    global _backend_pool
+    with _lock:
+        if _backend_pool is None:
+            _backend_pool = BackendPool(
+                parse_backends(OLLAMA_BACKENDS, OLLAMA_BASE_URL),
+                failure_types=TRANSIENT_ERRORS,
+            )
+            _backend_pool.start_health_checks()
+        return _backend_pool
+
+
+def get_openai_client(base_url: str = None) -> openai.OpenAI:
+    base_url = base_url or f"{OLLAMA_BASE_URL}/v1/"
+    return _get_or_create(
+        ("openai", base_url),
+        lambda: openai.OpenAI(base_url=base_url, api_key="ollama", http_client=httpx.Client(**http_client_options())),
+    )
+
+
+def get_ollama_client(base_url: str = None) -> ollama.Client:
+    base_url = base_url or OLLAMA_BASE_URL
+    return _get_or_create(("ollama", base_url), lambda: ollama.Client(host=base_url, **http_client_options()))
+
+
+def get_chat_model(model: str, temperature: float = 0, base_url: str = None) -> Union[ChatOllama, "PooledChatModel"]:
+    if base_url is None:
+        return _get_or_create(("pooled_chat", model, temperature), lambda: PooledChatModel(model, temperature))
+    return _get_or_create(
+        ("chat", base_url, model, temperature),
+        lambda: ChatOllama(
+            model=model,
+            temperature=temperature,
+            base_url=base_url,
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            sync_client_kwargs=http_client_options(),
+            async_client_kwargs=http_client_options(is_async=True),
+        ),
+    )
+
+
+def get_embeddings(model: str, base_url: str = None) -> Union[OllamaEmbeddings, "PooledEmbeddings"]:
+    if base_url is None:
+        return _get_or_create(("pooled_embeddings", model), lambda: PooledEmbeddings(model))
+    return _get_or_create(
+        ("embeddings", base_url, model),
+        lambda: OllamaEmbeddings(
+            model=model,
+            base_url=base_url,
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            sync_client_kwargs=http_client_options(),
+            async_client_kwargs=http_client_options(is_async=True),
+        ),
+    )
+
+
+class PooledChatModel:
+    """Sends each `invoke`/`ainvoke`/`batch` call to the least busy backend of the pool."""
+
+    def __init__(self, model: str, temperature: float = 0):
+        self.model = model
+        self.temperature = temperature
+
+    def invoke(self, input, **kwargs):
+        return get_backend_pool().run(
+            lambda backend: get_chat_model(self.model, self.temperature, backend.url).invoke(input, **kwargs)
+        )
+
+    async def ainvoke(self, input, **kwargs):
+        return await get_backend_pool().arun(
+            lambda backend: get_chat_model(self.model, self.temperature, backend.url).ainvoke(input, **kwargs)
+        )
+
+    def batch(self, inputs: list, config: dict = None, **kwargs) -> list:
+        # Every prompt is routed on its own, so a batch spreads over all backends.
+        max_concurrency = (config or {}).get("max_concurrency") or len(inputs) or 1
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(lambda prompt: self.invoke(prompt, **kwargs), inputs))
+
+
+class PooledEmbeddings(Embeddings):
+    """Embeddings spread over the backend pool; every backend must serve the same embedding model."""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return get_backend_pool().run(lambda backend: get_embeddings(self.model, backend.url).embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return get_backend_pool().run(lambda backend: get_embeddings(self.model, backend.url).embed_query(text))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await get_backend_pool().arun(lambda backend: get_embeddings(self.model, backend.url).aembed_documents(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await get_backend_pool().arun(lambda backend: get_embeddings(self.model, backend.url).aembed_query(text))
@@ -0,0 +1,139 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from termcolor import colored
+
+from .tokens import count_tokens, truncate_to_tokens
+
+"""
+Builds the chat messages for a provider request under an explicit token budget. The system prompt
+and the user's message are always sent; the rest is filled in priority order: tool results, the
+most recent turns of this conversation, the Slack thread context, and finally a short extractive
+summary of the older turns that no longer fit.
+"""
+
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 3500))
+TOOL_RESULT_SHARE = float(os.environ.get("TOOL_RESULT_SHARE", 0.6))
+SUMMARY_LINE_TOKENS = 40
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@dataclass
+class AssembledContext:
+    messages: List[dict]
+    budget: int
+    breakdown: Dict[str, int] = field(default_factory=dict)
+    dropped_turns: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.breakdown.values())
+
+    def log(self):
+        parts = ", ".join(f"{name}={tokens}" for name, tokens in self.breakdown.items())
+        action = "summarized" if "summary" in self.breakdown else "dropped"
+        dropped = f", {self.dropped_turns} older turns {action}" if self.dropped_turns else ""
+        print(colored(f"Prompt tokens {self.total}/{self.budget} ({parts}{dropped})", "cyan"))
+
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(str(message.get("content") or "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_turns(history: List[dict]) -> List[List[dict]]:
+    # A turn starts at each user message.
+    turns = []
+    for message in history:
+        if message.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def format_thread_context(context: List[dict], budget: int) -> Optional[str]:
+    if not context or budget <= 0:
+        return None
+    header = "Recent messages in this Slack thread:"
+    lines, used = [], count_tokens(header) + MESSAGE_OVERHEAD_TOKENS
+    # Newest messages matter most; keep as many as fit, then restore chronological order.
+    for message in reversed(context):
+        line = f"<@{message.get('user')}>: {message.get('text')}"
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    if not lines:
+        return None
+    return "\n".join([header] + list(reversed(lines)))
+
+
+def summarize_turns(turns: List[List[dict]], budget: int) -> Optional[str]:
+    # Extractive summary (no model call): the start of each older question and answer.
+    if not turns or budget <= 0:
+        return None
+    header = "Summary of earlier turns in this conversation:"
+    lines = []
+    for turn in turns:
+        for message in turn:
+            if message.get("role") in ("user", "assistant") and message.get("content"):
+                lines.append(f"- {message['role']}: {truncate_to_tokens(message['content'], SUMMARY_LINE_TOKENS)}")
+    summary = truncate_to_tokens("\n".join([header] + lines), budget - MESSAGE_OVERHEAD_TOKENS)
+    return summary if lines and summary else None
+
+
+def assemble_messages(
+    system_content: str,
+    prompt: str,
+    history: Optional[List[dict]] = None,
+    thread_context: Optional[List[dict]] = None,
+    tool_messages: Optional[List[dict]] = None,
+    budget: int = PROMPT_TOKEN_BUDGET,
+) -> AssembledContext:
+    system_message = {"role": "system", "content": system_content}
+    user_message = {"role": "user", "content": prompt}
+    breakdown = {"system": message_tokens(system_message), "prompt": message_tokens(user_message)}
+    remaining = budget - breakdown["system"] - breakdown["prompt"]
+
+    # 1. Tool results: the answer depends on them. Together they may take TOOL_RESULT_SHARE of what is
+    # left, split equally, so a huge board dump cannot push out the conversation entirely.
+    fitted_tools = []
+    if tool_messages:
+        share = max(int(remaining * TOOL_RESULT_SHARE) // len(tool_messages), 0)
+        for message in tool_messages:
+            content = truncate_to_tokens(str(message.get("content") or ""), share - MESSAGE_OVERHEAD_TOKENS)
+            fitted_tools.append({**message, "content": content})
+        breakdown["tools"] = sum(message_tokens(message) for message in fitted_tools)
+        remaining -= breakdown["tools"]
+
+    # 2. Most recent turns of this conversation, newest first, whole turns only.
+    turns = split_turns(history or [])
+    kept_turns = []
+    for turn in reversed(turns):
+        cost = sum(message_tokens(message) for message in turn)
+        if cost > remaining:
+            break
+        kept_turns.insert(0, turn)
+        remaining -= cost
+    breakdown["history"] = sum(message_tokens(message) for turn in kept_turns for message in turn)
+    dropped_turns = turns[: len(turns) - len(kept_turns)]
+
+    # 3. Slack thread context, 4. summary of the turns that did not fit.
+    thread_text = format_thread_context(thread_context, remaining)
+    thread_message = {"role": "system", "content": thread_text} if thread_text else None
+    if thread_message:
+        breakdown["thread"] = message_tokens(thread_message)
+        remaining -= breakdown["thread"]
+
+    summary_text = summarize_turns(dropped_turns, remaining)
+    summary_message = {"role": "system", "content": summary_text} if summary_text else None
+    if summary_message:
+        breakdown["summary"] = message_tokens(summary_message)
+
+    messages = [system_message]
+    messages += [message for message in (thread_message, summary_message) if message]
+    messages += [message for turn in kept_turns for message in turn]
+    messages.append(user_message)
+    messages += fitted_tools
+    return AssembledContext(messages=messages, budget=budget, breakdown=breakdown, dropped_turns=len(dropped_turns))
@@ -0,0 +1,135 @@
+import os
+import threading
+from typing import Callable, Optional
+
+from . import metrics
+
+"""
+Hedged LLM requests. The primary attempt starts at once; if it has not produced its first token
+within HEDGE_FIRST_TOKEN_SECONDS, a secondary attempt (another backend, or HEDGE_MODEL on the same
+one) is started as well. Whichever streams first wins, the other one is cancelled by closing its
+stream. Counters in `ai.metrics`: `hedge.requests`, `hedge.fired`, `hedge.wins.primary`,
+`hedge.wins.secondary` and `hedge.cancelled`. The p95 of `llm.first_token` (recorded by the
+provider for every streamed completion) is a good value for the deadline.
+"""
+
+HEDGE_FIRST_TOKEN_SECONDS = float(os.environ.get("HEDGE_FIRST_TOKEN_SECONDS", 0))
+HEDGE_MODEL = os.environ.get("HEDGE_MODEL", "")
+
+
+class CancelToken:
+    """Cancellation flag for one attempt; closing the attached stream aborts the generation in Ollama."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._closeables = []
+        self._lock = threading.Lock()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def attach(self, closeable):
+        with self._lock:
+            if not self._event.is_set():
+                self._closeables.append(closeable)
+                return
+        closeable.close()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            closeables, self._closeables = self._closeables, []
+        for closeable in closeables:
+            try:
+                closeable.close()
+            except Exception:
+                pass
+
+
+class _Attempt:
+    def __init__(self, name: str, function: Callable, race: "_Race"):
+        self.name = name
+        self.function = function
+        self.race = race
+        self.token = CancelToken()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f"hedge-{name}", daemon=True)
+
+    def emit(self, token: str):
+        # An empty token only signals activity (e.g. a tool call fragment); the first one decides the race.
+        if self.race.claim(self) and token and self.race.on_token:
+            self.race.on_token(token)
+
+    def _run(self):
+        try:
+            self.result = self.function(self.emit, self.token)
+            self.race.claim(self)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+            self.race.notify()
+
+
+class _Race:
+    def __init__(self, on_token: Optional[Callable[[str], None]]):
+        self.on_token = on_token
+        self.winner = None
+        self.condition = threading.Condition()
+
+    def claim(self, attempt: _Attempt) -> bool:
+        with self.condition:
+            if self.winner is None and not attempt.token.is_set():
+                self.winner = attempt
+                self.condition.notify_all()
+            return self.winner is attempt
+
+    def notify(self):
+        with self.condition:
+            self.condition.notify_all()
+
+    def wait(self, predicate: Callable[[], bool], timeout: Optional[float] = None):
+        with self.condition:
+            self.condition.wait_for(predicate, timeout)
+
+
+def run_hedged(
+    primary: Callable,
+    secondary: Optional[Callable],
+    on_token: Optional[Callable[[str], None]] = None,
+    first_token_deadline: float = HEDGE_FIRST_TOKEN_SECONDS,
+):
+    """Runs `primary(emit, cancel_token)` and, past the deadline, `secondary(emit, cancel_token)`.
+
+    Attempts must call `emit(token)` for every streamed chunk and stop when `cancel_token` is set.
+    Only the winning attempt's tokens reach `on_token`.
+    """
+    race = _Race(on_token)
+    attempts = [_Attempt("primary", primary, race)]
+    attempts[0].thread.start()
+    metrics.incr("hedge.requests")
+
+    # A primary that fails before the deadline falls back to the secondary straight away.
+    race.wait(lambda: race.winner is not None or attempts[0].done.is_set(), first_token_deadline)
+    if race.winner is None and secondary is not None:
+        metrics.incr("hedge.fired")
+        attempts.append(_Attempt("secondary", secondary, race))
+        attempts[1].thread.start()
+
+    race.wait(lambda: race.winner is not None or all(attempt.done.is_set() for attempt in attempts))
+    winner = race.winner
+    for attempt in attempts:
+        if attempt is not winner and not attempt.done.is_set():
+            attempt.token.cancel()
+            metrics.incr("hedge.cancelled")
+    if winner is None:
+        raise attempts[0].error or attempts[-1].error
+
+    if len(attempts) > 1:
+        metrics.incr(f"hedge.wins.{winner.name}")
+    winner.done.wait()
+    if winner.error is not None:
+        raise winner.error
+    return winner.result
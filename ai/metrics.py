@@ -0,0 +1,58 @@
+import threading
+from collections import defaultdict, deque
+
+"""
+Process-wide counters and latency samples, shared by the providers and tools so cache hits,
+connection reuse, tool latencies and similar can be inspected from one place via `snapshot()`.
+"""
+
+SAMPLE_SIZE = 1024
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=SAMPLE_SIZE)})
+
+
+def incr(name: str, value: int = 1):
+    with _lock:
+        _counters[name] += value
+
+
+def counter(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def observe(name: str, seconds: float):
+    with _lock:
+        timing = _timings[name]
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+        timing["samples"].append(seconds)
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def snapshot() -> dict:
+    with _lock:
+        timings = {
+            name: {
+                "count": timing["count"],
+                "avg": timing["total"] / timing["count"] if timing["count"] else 0.0,
+                "p50": _percentile(timing["samples"], 0.50),
+                "p95": _percentile(timing["samples"], 0.95),
+                "max": timing["max"],
+            }
+            for name, timing in _timings.items()
+        }
+        return {"counters": dict(_counters), "timings": timings}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,61 @@
+import os
+import json
+import time
+import threading
+
+from termcolor import colored
+
+from . import metrics
+from .clients import get_backend_pool
+from .tools import rag
+from .tools.tool_cache import TOOL_RESULT_CACHE
+from .warmup import warmup_status
+
+"""
+Periodic log of the counters and latencies collected in `ai.metrics`, together with the state of
+the Ollama backend pool, the warm-up and the caches, so cache hit rates, hedging and tool latencies
+can be followed from the bot's output. Printed every METRICS_LOG_SECONDS (0 disables it).
+"""
+
+METRICS_LOG_SECONDS = float(os.environ.get("METRICS_LOG_SECONDS", 300))
+
+_thread = None
+
+
+def report() -> dict:
+    return {
+        **metrics.snapshot(),
+        "backends": get_backend_pool().status(),
+        "warmup": warmup_status(),
+        "caches": {
+            "embedding": rag.QUERY_EMBEDDING_CACHE.stats(),
+            "answer": rag.ANSWER_CACHE.stats(),
+            "tool": {"entries": len(TOOL_RESULT_CACHE)},
+        },
+    }
+
+
+def log_report():
+    data = report()
+    timings = {
+        name: f"n={timing['count']} p50={timing['p50'] * 1000:.0f}ms p95={timing['p95'] * 1000:.0f}ms"
+        for name, timing in sorted(data.pop("timings").items())
+    }
+    print(colored(f"Metrics: {json.dumps({**data, 'timings': timings}, sort_keys=True, default=str)}", "cyan"))
+
+
+def _run():
+    while True:
+        time.sleep(METRICS_LOG_SECONDS)
+        try:
+            log_report()
+        except Exception as e:
+            print(colored(f"Could not log metrics: {e}", "red"))
+
+
+def start_metrics_log() -> threading.Thread:
+    global _thread
+    if _thread is None and METRICS_LOG_SECONDS > 0:
+        _thread = threading.Thread(target=_run, name="metrics-log", daemon=True)
+        _thread.start()
+    return _thread
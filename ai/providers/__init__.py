@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import Callable, List, Optional
 from state_store.get_user_state import get_user_state
+from state_store.get_conversation_store import conversation_key
 from ..ai_constants import DEFAULT_SYSTEM_CONTENT
 from .openai import OpenAI_API
+from .router import resolve_answer_model
 from termcolor import colored
 
 # from .anthropic import AnthropicAPI  # Removemos esta importación
@@ -28,11 +30,26 @@ def _get_provider(provider_name: str):
 
 
 def get_provider_response(
-    user_id: str, prompt: str, context: Optional[List[dict]] = None, system_content: str = DEFAULT_SYSTEM_CONTENT
+    user_id: str,
+    prompt: str,
+    context: Optional[List[dict]] = None,
+    system_content: str = DEFAULT_SYSTEM_CONTENT,
+    conversation_id: Optional[str] = None,
+    on_token: Optional[Callable[[str], None]] = None,
 ) -> str:
     try:
         provider = OpenAI_API()
-        return provider.generate_response(prompt, system_content)
+        # `context` is the Slack thread (parse_conversation output); the assembler fits it into the prompt budget.
+        # With `on_token` the completion is streamed and every text delta is passed to it as it arrives.
+        # The answer model is the one picked in App Home, if any.
+        return provider.generate_response(
+            prompt,
+            system_content,
+            conversation_id or conversation_key(user_id),
+            context,
+            on_token,
+            resolve_answer_model(user_id),
+        )
     except Exception as e:
         print(colored(f"Error getting provider response: {str(e)}", "red"))
         raise e
@@ -1,6 +1,16 @@
+from typing import Callable, List, Optional
+
 # A base class for API providers, defining the interface and common properties for subclasses.
 
 
 class BaseAPIProvider(object):
-    def generate_response(self, prompt: str, system_content: str) -> str:
+    def generate_response(
+        self,
+        prompt: str,
+        system_content: str,
+        conversation_id: str = None,
+        context: Optional[List[dict]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+    ) -> str:
         raise NotImplementedError("Subclass must implement generate_response")
@@ -1,5 +1,7 @@
 import os
-import json
+import time
+from types import SimpleNamespace
+from typing import Callable, List, Optional
 import openai
 from .base_provider import BaseAPIProvider
 import logging
@@ -21,6 +23,15 @@ from ..tools.github_connection import (
     get_github_instance,
 )
 from ..tools.rag import query_rag
+from ..tools.tool_executor import run_tool_calls
+from ..tools.tool_cache import MUTATING_TOOLS
+from ..clients import get_backend_pool, get_openai_client
+from ..context_assembler import assemble_messages
+from ..singleflight import SingleFlight, request_key
+from .router import OLLAMA_CHAT_MODEL, TOOL_ROUTER_MODEL, build_router_messages, get_models
+from ..hedging import HEDGE_FIRST_TOKEN_SECONDS, HEDGE_MODEL, CancelToken, run_hedged
+from .. import metrics
+from state_store.get_conversation_store import get_conversation_store
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
@@ -35,86 +46,44 @@ BOARD_ID = os.getenv("BOARD_ID")
 github_instance = get_github_instance()
 github_user = github_instance.get_user()
 
-# Initialize conversation history
-conversation_history = []
+PROVIDER_FLIGHTS = SingleFlight("provider")
 
 
 class OpenAI_API(BaseAPIProvider):
 
     def __init__(self):
         try:
-            self.base_url = "http://localhost:11434/v1/"
             self.api_key = "ollama"
-            print(colored(f"OpenAI API initialized with base URL: {self.base_url}", "green"))
+            # Completions are routed over the shared backend pool; clients keep their connections alive.
+            self.backend_pool = get_backend_pool()
+            self.base_urls = [f"{backend.url}/v1/" for backend in self.backend_pool.backends]
+            self.conversation_store = get_conversation_store()
+            print(colored(f"OpenAI API initialized with base URLs: {', '.join(self.base_urls)}", "green"))
         except Exception as e:
             print(colored(f"Error initializing OpenAI API: {str(e)}", "red"))
             raise e
 
-    def generate_response(self, prompt: str, system_content: str) -> str:
-        global conversation_history
-        current_conversation = []
+    def generate_response(
+        self,
+        prompt: str,
+        system_content: str,
+        conversation_id: str = None,
+        context: Optional[List[dict]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        model = model or OLLAMA_CHAT_MODEL
+        # Only this conversation's last turns are sent, so the prompt no longer grows with bot uptime.
+        history = self.conversation_store.get_history(conversation_id) if conversation_id else []
+        user_message = {"role": "user", "content": prompt}
         try:
-            self.client = openai.OpenAI(base_url=self.base_url, api_key=self.api_key)
-            current_conversation.append({"role": "system", "content": system_content})
-            current_conversation.append({"role": "user", "content": prompt})
-            messages = conversation_history + current_conversation
-
-            response = self.client.chat.completions.create(
-                model="llama3.2",
-                messages=messages,
-                temperature=0.1,
-                tools=schema,
-                tool_choice="auto",
-            )
-            response_message = response.choices[0].message
-            tool_calls = response_message.tool_calls
-
-            if tool_calls:
-                availabe_functions = {
-                    # Trello functions
-                    "get_trello_board_info": get_trello_board_info,
-                    "get_list_cards": get_list_cards,
-                    "add_card_to_list": add_card_to_list,
-                    "delete_card": delete_card,
-                    "search_card_descriptions": search_card_descriptions,
-                    "get_latest_card": get_latest_card,
-                    # GitHub functions
-                    "list_user_repos": list_user_repos,
-                    "print_repo_contents": print_repo_contents,
-                    "list_branches": list_branches,
-                    "show_commit_history": show_commit_history,
-                    # Rag functions
-                    "query_rag": query_rag,
-                }
-
-                function_responses = []
-
-                for tool_call in tool_calls:
-                    function_name = tool_call.function.name
-                    function_to_call = availabe_functions[function_name]
-                    function_args = json.loads(tool_call.function.arguments)
-                    function_response = function_to_call(**function_args)
-                    function_responses.append(str(function_response))
-                    current_conversation.append(
-                        {
-                            "tool_call_id": tool_call.id,
-                            "role": "tool",
-                            "name": function_name,
-                            "content": str(function_response),
-                        }
-                    )
-                    messages = conversation_history + current_conversation
-
-                tools_response = self.client.chat.completions.create(model="llama3.2", messages=messages, temperature=0.1)
-                response_with_tools = tools_response.choices[0].message.content
-                current_conversation.append({"role": "assistant", "content": response_with_tools})
-                conversation_history = messages + [{"role": "assistant", "content": response_with_tools}]
-                return response_with_tools
-            else:
-                final_response = response_message.content
-                current_conversation.append({"role": "assistant", "content": final_response})
-                conversation_history = messages + [{"role": "assistant", "content": final_response}]
-                return final_response
+            # Identical requests in flight (same exact prompt, thread context and history) share one answer.
+            # Only the first caller streams; the others receive the finished text. Turns that call a
+            # mutating tool are not shared (see `_answer`).
+            key = request_key(model, system_content, prompt, context, history)
+            response = PROVIDER_FLIGHTS.do(key, self._answer, prompt, system_content, history, context, on_token, model)
+            self._remember(conversation_id, user_message, response)
+            return response
 
         except openai.APIConnectionError as e:
             error_msg = f"No se pudo conectar con el servidor: {e.__cause__}"
@@ -136,3 +105,164 @@ class OpenAI_API(BaseAPIProvider):
             error_msg = f"Error inesperado: {str(e)}"
             logger.error(colored(error_msg, "red"))
             return error_msg
+
+    def _answer(
+        self,
+        prompt: str,
+        system_content: str,
+        history: List[dict],
+        context: Optional[List[dict]],
+        on_token: Optional[Callable[[str], None]],
+        model: str,
+    ) -> str:
+        if TOOL_ROUTER_MODEL:
+            # Tier 1: the small model sees a short prompt and only picks tools; nothing of it is shown.
+            routing = build_router_messages(prompt, history, context)
+            routing.log()
+            _content, tool_calls = self._complete(
+                routing.messages, model=TOOL_ROUTER_MODEL, tools=schema, tool_choice="auto"
+            )
+        else:
+            assembled = assemble_messages(system_content, prompt, history, context)
+            assembled.log()
+            content, tool_calls = self._complete(assembled.messages, on_token, model=model, tools=schema, tool_choice="auto")
+            if not tool_calls:
+                return content
+
+        availabe_functions = {
+            # Trello functions
+            "get_trello_board_info": get_trello_board_info,
+            "get_list_cards": get_list_cards,
+            "add_card_to_list": add_card_to_list,
+            "delete_card": delete_card,
+            "search_card_descriptions": search_card_descriptions,
+            "get_latest_card": get_latest_card,
+            # GitHub functions
+            "list_user_repos": list_user_repos,
+            "print_repo_contents": print_repo_contents,
+            "list_branches": list_branches,
+            "show_commit_history": show_commit_history,
+            # Rag functions
+            "query_rag": query_rag,
+        }
+
+        # "Create card X" asked twice means two cards: identical requests waiting on this one run on their own.
+        if tool_calls and any(tool_call.function.name in MUTATING_TOOLS for tool_call in tool_calls):
+            PROVIDER_FLIGHTS.unshare()
+
+        # Independent calls run concurrently; the turn takes about as long as the slowest tool.
+        tool_messages = run_tool_calls(tool_calls, availabe_functions) if tool_calls else None
+
+        # Tier 2 (or the second hop): the answer model writes the reply from the full prompt and tool results.
+        # Tool outputs (board dumps, commit logs) can be large; they are fitted into the same budget.
+        assembled = assemble_messages(system_content, prompt, history, context, tool_messages)
+        assembled.log()
+        response_with_tools, _ = self._complete(assembled.messages, on_token, model=model)
+        return response_with_tools
+
+    def _complete(
+        self,
+        messages: List[dict],
+        on_token: Optional[Callable[[str], None]] = None,
+        model: str = OLLAMA_CHAT_MODEL,
+        **kwargs,
+    ):
+        if HEDGE_FIRST_TOKEN_SECONDS > 0:
+            return self._complete_hedged(messages, on_token, model, **kwargs)
+
+        # Each completion goes to the least busy backend. A connection failure before anything was
+        # streamed to Slack is retried once on a different backend.
+        streamed = []
+
+        def forward(token: str):
+            streamed.append(token)
+            if token:
+                on_token(token)
+
+        def request(backend):
+            client = get_openai_client(f"{backend.url}/v1/")
+            return self._request(client, messages, forward if on_token else None, model, **kwargs)
+
+        return self.backend_pool.run(request, can_retry=lambda: not streamed)
+
+    def _complete_hedged(self, messages: List[dict], on_token: Optional[Callable[[str], None]], model: str, **kwargs):
+        # The hedge replaces the retry: a slow or failing primary is raced against another backend
+        # (same model) or, with a single backend, against the smaller HEDGE_MODEL.
+        used = []
+
+        def attempt(model: str, exclude: List):
+            def run(emit: Callable[[str], None], cancel_token: CancelToken):
+                def request(backend):
+                    used.append(backend)
+                    client = get_openai_client(f"{backend.url}/v1/")
+                    return self._request(client, messages, emit, model=model, cancel_token=cancel_token, **kwargs)
+
+                return self.backend_pool.run(request, attempts=1, exclude=exclude)
+
+            return run
+
+        if len(self.backend_pool.backends) > 1:
+            secondary = attempt(model, used)
+        else:
+            secondary = attempt(HEDGE_MODEL, []) if HEDGE_MODEL else None
+        return run_hedged(attempt(model, []), secondary, on_token)
+
+    def _request(
+        self,
+        client: openai.OpenAI,
+        messages: List[dict],
+        on_token: Optional[Callable[[str], None]],
+        model: str = OLLAMA_CHAT_MODEL,
+        cancel_token: Optional[CancelToken] = None,
+        **kwargs,
+    ):
+        if on_token is None:
+            response = client.chat.completions.create(model=model, messages=messages, temperature=0.1, **kwargs)
+            response_message = response.choices[0].message
+            return response_message.content, response_message.tool_calls
+
+        # Streamed: text deltas go to `on_token` as they arrive, tool call fragments are stitched back together.
+        started = time.perf_counter()
+        stream = client.chat.completions.create(model=model, messages=messages, temperature=0.1, stream=True, **kwargs)
+        if cancel_token is not None:
+            cancel_token.attach(stream)
+        content, calls, first_chunk = [], {}, True
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                if first_chunk:
+                    metrics.observe("llm.first_token", time.perf_counter() - started)
+                    first_chunk = False
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content.append(delta.content)
+                on_token(delta.content or "")
+                self._collect_tool_calls(calls, delta.tool_calls)
+        except Exception:
+            # A hedge loser's stream is closed under it; that is not a backend failure.
+            if cancel_token is not None and cancel_token.is_set():
+                return None
+            raise
+        tool_calls = [
+            SimpleNamespace(id=entry["id"], function=SimpleNamespace(name=entry["name"], arguments=entry["arguments"]))
+            for _index, entry in sorted(calls.items())
+        ]
+        return "".join(content), tool_calls or None
+
+    @staticmethod
+    def _collect_tool_calls(calls: dict, tool_call_deltas):
+        for call in tool_call_deltas or []:
+            entry = calls.setdefault(call.index, {"id": None, "name": "", "arguments": ""})
+            entry["id"] = call.id or entry["id"]
+            if call.function:
+                entry["name"] += call.function.name or ""
+                entry["arguments"] += call.function.arguments or ""
+
+    def get_models(self) -> dict:
+        return get_models()
+
+    def _remember(self, conversation_id: str, user_message: dict, response: str):
+        # Tool outputs stay within their turn; only the question and the final answer are kept.
+        if conversation_id:
+            self.conversation_store.append_turn(conversation_id, [user_message, {"role": "assistant", "content": response}])
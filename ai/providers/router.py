@@ -0,0 +1,41 @@
+import os
+from typing import List, Optional
+
+from state_store.get_user_state import get_user_state
+from ..ai_constants import TOOL_ROUTER_SYSTEM_CONTENT
+from ..context_assembler import AssembledContext, assemble_messages
+
+"""
+Two-tier model routing. When TOOL_ROUTER_MODEL is set, a small model with a short prompt only picks
+the tools and their arguments, and the answer model (the one the user selected in App Home, or
+OLLAMA_CHAT_MODEL) writes the reply from the full system prompt and the tool results. Without it,
+the answer model does both in the same request, as before.
+"""
+
+OLLAMA_CHAT_MODEL = os.environ.get("OLLAMA_CHAT_MODEL", "llama3.2")
+# Models offered in App Home; each must be pulled on every Ollama backend.
+ANSWER_MODELS = [model.strip() for model in os.environ.get("ANSWER_MODELS", OLLAMA_CHAT_MODEL).split(",") if model.strip()]
+TOOL_ROUTER_MODEL = os.environ.get("TOOL_ROUTER_MODEL", "")
+TOOL_ROUTER_TOKEN_BUDGET = int(os.environ.get("TOOL_ROUTER_TOKEN_BUDGET", 1500))
+
+
+def get_models() -> dict:
+    return {model: {"name": model, "provider": "OpenAI"} for model in ANSWER_MODELS}
+
+
+def resolve_answer_model(user_id: Optional[str]) -> str:
+    # Honour the App Home selection when it names one of our models, otherwise use the default.
+    try:
+        user_state = get_user_state(user_id, False) if user_id else None
+    except FileNotFoundError:
+        user_state = None
+    if user_state:
+        provider_name, model_name = user_state
+        if provider_name == "openai" and model_name in ANSWER_MODELS:
+            return model_name
+    return OLLAMA_CHAT_MODEL
+
+
+def build_router_messages(prompt: str, history: List[dict], context: Optional[List[dict]]) -> AssembledContext:
+    # The thread and recent turns stay in, so "that card" or "the same repo" can still be resolved.
+    return assemble_messages(TOOL_ROUTER_SYSTEM_CONTENT, prompt, history, context, budget=TOOL_ROUTER_TOKEN_BUDGET)
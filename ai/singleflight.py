@@ -0,0 +1,89 @@
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Hashable
+
+from . import metrics
+
+"""
+Single-flight request coalescing: while a call for a key is in flight, identical calls wait for it
+and share its result (or exception) instead of doing the same work again. Used for provider answers,
+read-only tool calls and RAG queries, so a burst of identical questions costs one trip to Ollama.
+A flight that turns out to have side effects calls `unshare`, and its waiters run on their own.
+"""
+
+
+class _Call:
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.shared = True
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(key)
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if not call.shared:
+                # The leader's work had side effects (see `unshare`), so this caller does its own.
+                metrics.incr(f"singleflight.{self.name}.unshared")
+                return function(*args, **kwargs)
+            metrics.incr(f"singleflight.{self.name}.shared")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.incr(f"singleflight.{self.name}.executed")
+        previous, self._local.call = getattr(self._local, "call", None), call
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._local.call = previous
+            # Later callers start a fresh flight; results are only shared while the work is running.
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def unshare(self):
+        """Called from inside the leader's function once it does something that must not be shared,
+        such as a write: callers waiting on it, and later ones, run the function themselves."""
+        call = getattr(self._local, "call", None)
+        if call is None:
+            return
+        with self._lock:
+            call.shared = False
+            if self._calls.get(call.key) is call:
+                del self._calls[call.key]
+        # Waiters need not wait for the leader to finish before starting their own call.
+        call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def request_key(*parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,60 @@
+import re
+from functools import lru_cache
+
+"""
+Token counting shared by the prompt builders. Uses tiktoken's cl100k_base encoding (close to
+llama3's BPE vocabulary) once `load_tokenizer` has loaded it, and a word/punctuation estimate until
+then or when tiktoken is not installed. tiktoken downloads the encoding on first use without a
+timeout, so it is loaded by the startup warm-up and never on a request path.
+"""
+
+_ESTIMATE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+class _EstimatingTokenizer:
+    def encode(self, text: str):
+        return _ESTIMATE.findall(text)
+
+    def decode(self, tokens) -> str:
+        return " ".join(tokens)
+
+
+_ESTIMATOR = _EstimatingTokenizer()
+_tokenizer = None
+
+
+def get_tokenizer():
+    return _tokenizer or _ESTIMATOR
+
+
+def load_tokenizer() -> bool:
+    global _tokenizer
+    if _tokenizer is None:
+        try:
+            import tiktoken
+
+            _tokenizer = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            return False
+        # Counts cached so far came from the estimate.
+        count_tokens.cache_clear()
+    return True
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer().encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    tokenizer = get_tokenizer()
+    tokens = tokenizer.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    if isinstance(tokenizer, _EstimatingTokenizer):
+        # Cut the original text at the end of the last kept token to preserve its spacing.
+        match = list(_ESTIMATE.finditer(text))[max_tokens - 1]
+        return text[: match.end()]
+    return tokenizer.decode(tokens[:max_tokens])
@@ -0,0 +1,97 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from .. import metrics
+
+"""
+Cache of generated RAG answers. An entry is reused when the same set of chunks is retrieved
+and the new question embedding is close enough to the cached one. Entries are dropped as soon
+as the vector store version changes (i.e. the knowledge base was re-ingested). Hits and misses
+are counted in `ai.metrics` under `answer_cache.*`.
+"""
+
+
+@dataclass
+class CachedAnswer:
+    query_vector: List[float]
+    answer: str
+    created_at: float
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        store_version: Callable[[], object],
+        similarity_threshold: float = 0.95,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+    ):
+        self.store_version = store_version
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, List[CachedAnswer]]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(chunk_ids: Iterable[str]) -> tuple:
+        return tuple(sorted(chunk_id for chunk_id in chunk_ids if chunk_id))
+
+    def _check_version(self):
+        version = self.store_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, chunk_ids: Iterable[str], query_vector: List[float]) -> Optional[str]:
+        key = self._key(chunk_ids)
+        query_vector = _normalize(query_vector)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            candidates = self._entries.get(key, [])
+            for candidate in candidates:
+                if now - candidate.created_at > self.ttl_seconds:
+                    continue
+                similarity = sum(a * b for a, b in zip(candidate.query_vector, query_vector))
+                if similarity >= self.similarity_threshold:
+                    self._entries.move_to_end(key)
+                    metrics.incr("answer_cache.hits")
+                    return candidate.answer
+        metrics.incr("answer_cache.misses")
+        return None
+
+    def put(self, chunk_ids: Iterable[str], query_vector: List[float], answer: str):
+        key = self._key(chunk_ids)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            candidates = [c for c in self._entries.get(key, []) if now - c.created_at <= self.ttl_seconds]
+            candidates.append(CachedAnswer(_normalize(query_vector), answer, now))
+            self._entries[key] = candidates
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        hits, misses = metrics.counter("answer_cache.hits"), metrics.counter("answer_cache.misses")
+        return {
+            "entries": sum(len(candidates) for candidates in self._entries.values()),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,75 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+
+from ..tokens import count_tokens, truncate_to_tokens
+from .rerank import parse_chunk_id, strip_overlap
+
+"""
+Packs retrieved chunks into the RAG prompt context under a token budget. Adjacent chunks of the
+same `source:page` are merged into one section, sections keep their retrieval order and the last
+one that does not fit is trimmed, so prefill cost stays bounded whatever the chunks look like.
+"""
+
+SEPARATOR = "\n\n---\n\n"
+MIN_SECTION_TOKENS = 32
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    budget: int
+    chunk_ids: List[str] = field(default_factory=list)
+    truncated: bool = False
+
+
+def merge_adjacent_chunks(results: List[Tuple[Document, float]]) -> List[Tuple[str, str, List[str]]]:
+    # Returns (label, text, chunk_ids) sections, ordered by the best-ranked chunk of each section.
+    sections = []
+    by_page = {}
+    for document, _score in results:
+        chunk_id = document.metadata.get("id")
+        page_id, index = parse_chunk_id(chunk_id)
+        section = by_page.get(page_id) if page_id is not None else None
+        if section is not None and any(abs(index - other) == 1 for other in section["indexes"]):
+            section["parts"].append((index, document.page_content, chunk_id))
+            section["indexes"].add(index)
+            continue
+        section = {"label": page_id or chunk_id, "parts": [(index, document.page_content, chunk_id)], "indexes": {index}}
+        sections.append(section)
+        if page_id is not None:
+            by_page[page_id] = section
+
+    merged = []
+    for section in sections:
+        parts = sorted(section["parts"], key=lambda part: part[0] if part[0] is not None else 0)
+        text = parts[0][1]
+        for _index, part_text, _chunk_id in parts[1:]:
+            text = f"{text} {strip_overlap(text, part_text)}"
+        merged.append((section["label"], text, [chunk_id for _index, _text, chunk_id in parts]))
+    return merged
+
+
+def pack_context(results: List[Tuple[Document, float]], budget: int) -> PackedContext:
+    separator_tokens = count_tokens(SEPARATOR)
+    blocks, chunk_ids, used, truncated = [], [], 0, False
+
+    for label, text, section_ids in merge_adjacent_chunks(results):
+        block = f"[{label}]\n{text}" if label else text
+        cost = count_tokens(block) + (separator_tokens if blocks else 0)
+        if used + cost > budget:
+            remaining = budget - used - (separator_tokens if blocks else 0)
+            if remaining >= MIN_SECTION_TOKENS:
+                block = truncate_to_tokens(block, remaining)
+                blocks.append(block)
+                chunk_ids.extend(section_ids)
+                used += count_tokens(block) + (separator_tokens if len(blocks) > 1 else 0)
+            truncated = True
+            break
+        blocks.append(block)
+        chunk_ids.extend(section_ids)
+        used += cost
+
+    return PackedContext(text=SEPARATOR.join(blocks), tokens=used, budget=budget, chunk_ids=chunk_ids, truncated=truncated)
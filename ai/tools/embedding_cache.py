@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from .. import metrics
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+"""
+LRU cache of normalized query text -> embedding vector, so repeated questions skip the
+embedding round-trip to Ollama. Optionally persisted to a JSON file on disk. Hits and misses are
+counted in `ai.metrics` under `embedding_cache.*`.
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+class QueryEmbeddingCache:
+    def __init__(self, model: str, max_entries: int = 1024, persist_path: Optional[str] = None, save_every: int = 50):
+        self.model = model
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.save_every = save_every
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+        if persist_path:
+            self._load()
+            atexit.register(self.save)
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+        metrics.incr("embedding_cache.hits" if vector is not None else "embedding_cache.misses")
+        return vector
+
+    def put(self, text: str, vector: List[float]):
+        key = normalize_query(text)
+        with self._lock:
+            self._entries[key] = list(vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._unsaved += 1
+            should_save = self.persist_path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def stats(self) -> dict:
+        hits, misses = metrics.counter("embedding_cache.hits"), metrics.counter("embedding_cache.misses")
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            data = {"model": self.model, "entries": list(self._entries.items())}
+            self._unsaved = 0
+        try:
+            directory = os.path.dirname(self.persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            logger.error(f"Could not persist query embedding cache: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable query embedding cache: {e}")
+            return
+        # Vectors from another embedding model are useless, start empty.
+        if data.get("model") != self.model:
+            return
+        # The file holds entries oldest first; only the most recent `max_entries` fit.
+        entries = data.get("entries", [])
+        start = max(0, len(entries) - self.max_entries)
+        for key, vector in entries[start:]:
+            self._entries[key] = vector
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Wraps an embedding model so `embed_query` goes through a `QueryEmbeddingCache`."""
+
+    def __init__(self, embeddings: Embeddings, cache: QueryEmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self.cache.put(text, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        # Cache misses are embedded together in a single request.
+        vectors = [self.cache.get(text) for text in texts]
+        missing = [position for position, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = self.embeddings.embed_documents([texts[position] for position in missing])
+            for position, vector in zip(missing, embedded):
+                vectors[position] = vector
+                self.cache.put(texts[position], vector)
+        return vectors
@@ -0,0 +1,85 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from ..clients import TRANSIENT_ERRORS
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+"""
+Embedding stage used during ingestion. Splits texts into fixed-size requests, keeps a bounded
+number of them in flight against the embedding server, retries transport and timeout errors with
+exponential backoff and tracks throughput so `rag.py` can report chunks/sec. It is an `Embeddings`
+itself, so Chroma can be given the pipeline as its embedding function.
+"""
+
+
+class EmbeddingPipeline(Embeddings):
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 32,
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        retry_on: Tuple[type, ...] = TRANSIENT_ERRORS,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_on = retry_on
+        self.embedded = 0
+        self.seconds = 0.0
+        self.retries = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embed")
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return self.embeddings.embed_documents(texts)
+            except self.retry_on as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                self.retries += 1
+                logger.warning(f"Embedding request failed ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        requests = []
+        for start in range(0, len(texts), self.batch_size):
+            stop = start + self.batch_size
+            requests.append(texts[start:stop])
+        # `map` keeps at most `max_in_flight` requests running and returns them in input order.
+        vectors = []
+        for batch_vectors in self._executor.map(self._embed_batch, requests):
+            vectors.extend(batch_vectors)
+
+        self.seconds += time.perf_counter() - started
+        self.embedded += len(texts)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    @property
+    def throughput(self) -> float:
+        return self.embedded / self.seconds if self.seconds else 0.0
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import hashlib
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Iterable
+
+"""
+Persistent record of which knowledge base files have been ingested into the vector store.
+For every source file it keeps size, mtime, content hash and the chunk IDs it produced, so
+`rag.py` only parses new or changed files and can delete the chunks of changed or removed ones.
+"""
+
+MANIFEST_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class FileRecord:
+    path: str
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class IngestPlan:
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    stale_chunk_ids: List[str] = field(default_factory=list)
+    # Hashes computed while planning, reused when recording so no file is hashed twice.
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def to_ingest(self) -> List[str]:
+        return sorted(self.new + self.changed)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, FileRecord] = {}
+        self.generation = 0
+        self.updated_at = 0.0
+
+    @classmethod
+    def load(cls, path: str) -> "IngestManifest":
+        manifest = cls(path)
+        if not os.path.exists(path):
+            return manifest
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != MANIFEST_VERSION:
+            # Unknown layout: start over, every file will be treated as new.
+            return manifest
+        manifest.generation = data.get("generation", 0)
+        manifest.updated_at = data.get("updated_at", 0.0)
+        manifest.files = {record["path"]: FileRecord(**record) for record in data.get("files", [])}
+        return manifest
+
+    def save(self, bump_generation: bool = True):
+        # The generation only moves when the vector store content changed, so caches can key on it.
+        if bump_generation:
+            self.generation += 1
+        self.updated_at = time.time()
+        data = {
+            "version": MANIFEST_VERSION,
+            "generation": self.generation,
+            "updated_at": self.updated_at,
+            "files": [asdict(record) for _path, record in sorted(self.files.items())],
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, self.path)
+
+    def plan(self, file_paths: Iterable[str]) -> IngestPlan:
+        plan = IngestPlan()
+        seen = set()
+
+        for path in sorted(file_paths):
+            seen.add(path)
+            stat = os.stat(path)
+            record = self.files.get(path)
+
+            if record is None:
+                plan.new.append(path)
+                continue
+
+            # Cheap check first: same size and mtime means the file was not touched.
+            if record.size == stat.st_size and record.mtime == stat.st_mtime:
+                plan.unchanged.append(path)
+                continue
+
+            content_hash = hash_file(path)
+            plan.hashes[path] = content_hash
+            if content_hash == record.sha256:
+                # Touched but identical content, only refresh the stat information.
+                record.size, record.mtime = stat.st_size, stat.st_mtime
+                plan.unchanged.append(path)
+            else:
+                plan.changed.append(path)
+                plan.stale_chunk_ids.extend(record.chunk_ids)
+
+        for path, record in self.files.items():
+            if path not in seen:
+                plan.deleted.append(path)
+                plan.stale_chunk_ids.extend(record.chunk_ids)
+
+        return plan
+
+    def record(self, path: str, chunk_ids: List[str], content_hash: str = None):
+        stat = os.stat(path)
+        self.files[path] = FileRecord(
+            path=path,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            sha256=content_hash or hash_file(path),
+            chunk_ids=list(chunk_ids),
+        )
+
+    def forget(self, path: str):
+        self.files.pop(path, None)
@@ -0,0 +1,161 @@
+import os
+import re
+import math
+import gzip
+import json
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+"""
+BM25 inverted index over the knowledge base chunks. Complements vector search for exact
+identifiers (endpoint paths, error codes, card names) that embeddings tend to blur.
+The index is kept next to the vector DB as gzipped JSON with delta-encoded postings.
+"""
+
+# Version 2 tokenizes Unicode words, so accented terms ("configuración") are indexed whole.
+INDEX_VERSION = 2
+_TOKEN = re.compile(r"\w+(?:[./:\-]\w+)*")
+_PART = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    # Compound tokens such as "/api/v1/users" or "err-404" are kept whole, plus their parts,
+    # so both the exact identifier and its pieces can match.
+    tokens = []
+    for match in _TOKEN.findall(text.lower()):
+        tokens.append(match)
+        parts = _PART.findall(match)
+        if len(parts) > 1 or (parts and parts[0] != match):
+            tokens.extend(parts)
+    return tokens
+
+
+class LexicalIndex:
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        # Deleted documents leave a None in `doc_ids` until the next save compacts the index.
+        self.doc_ids: List[str] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._positions: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != INDEX_VERSION:
+            return index
+
+        index.doc_ids = data["doc_ids"]
+        index.lengths = data["lengths"]
+        index._positions = {doc_id: position for position, doc_id in enumerate(index.doc_ids)}
+        index._total_length = sum(index.lengths)
+        for term, encoded in data["postings"].items():
+            half = len(encoded) // 2
+            position, postings = 0, {}
+            for delta, frequency in zip(encoded[:half], encoded[half:]):
+                position += delta
+                postings[position] = frequency
+            index.postings[term] = postings
+        return index
+
+    def save(self):
+        with self._lock:
+            self._compact()
+            postings = {}
+            for term, term_postings in self.postings.items():
+                positions = sorted(term_postings)
+                deltas = [position - previous for previous, position in zip([0] + positions, positions)]
+                postings[term] = deltas + [term_postings[position] for position in positions]
+            data = {"version": INDEX_VERSION, "doc_ids": self.doc_ids, "lengths": self.lengths, "postings": postings}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def add(self, doc_ids: Iterable[str], texts: Iterable[str]):
+        with self._lock:
+            for doc_id, text in zip(doc_ids, texts):
+                if doc_id in self._positions:
+                    self._remove(doc_id)
+                terms = Counter(tokenize(text))
+                position = len(self.doc_ids)
+                self.doc_ids.append(doc_id)
+                length = sum(terms.values())
+                self.lengths.append(length)
+                self._total_length += length
+                self._positions[doc_id] = position
+                for term, frequency in terms.items():
+                    self.postings.setdefault(term, {})[position] = frequency
+
+    def remove(self, doc_ids: Iterable[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        position = self._positions.pop(doc_id, None)
+        if position is None:
+            return
+        self.doc_ids[position] = None
+        self._total_length -= self.lengths[position]
+
+    def _compact(self):
+        alive = [position for position, doc_id in enumerate(self.doc_ids) if doc_id is not None]
+        if len(alive) == len(self.doc_ids):
+            return
+        remap = {old: new for new, old in enumerate(alive)}
+        self.doc_ids = [self.doc_ids[position] for position in alive]
+        self.lengths = [self.lengths[position] for position in alive]
+        self._positions = {doc_id: position for position, doc_id in enumerate(self.doc_ids)}
+        postings = {}
+        for term, term_postings in self.postings.items():
+            kept = {remap[position]: tf for position, tf in term_postings.items() if position in remap}
+            if kept:
+                postings[term] = kept
+        self.postings = postings
+
+    def __len__(self):
+        return len(self._positions)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        with self._lock:
+            documents = len(self._positions)
+            if not documents:
+                return []
+            average_length = self._total_length / documents
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query)):
+                term_postings = self.postings.get(term)
+                if not term_postings:
+                    continue
+                live = [(position, tf) for position, tf in term_postings.items() if self.doc_ids[position] is not None]
+                if not live:
+                    continue
+                idf = math.log(1 + (documents - len(live) + 0.5) / (len(live) + 0.5))
+                for position, tf in live:
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / average_length)
+                    scores[position] = scores.get(position, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(self.doc_ids[position], score) for position, score in ranked]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
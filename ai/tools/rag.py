@@ -2,26 +2,76 @@ import sys
 import os
 import shutil
 from dataclasses import dataclass
-from typing import List
+from typing import List, Iterable
+from collections import deque
+from itertools import islice
 import argparse
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings, ChatOllama
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 
+from ..clients import get_chat_model, get_embeddings
+from ..singleflight import SingleFlight
+from .ingest_manifest import IngestManifest
+from .embedding_pipeline import EmbeddingPipeline
+from .embedding_cache import QueryEmbeddingCache, CachedQueryEmbeddings, normalize_query
+from .answer_cache import AnswerCache
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .rerank import rerank
+from .context_packer import pack_context
+from .vector_stores import (
+    FaissVectorStore,
+    SnapshotVectorStore,
+    build_faiss_index,
+    export_snapshot,
+    quantization_report,
+    FAISS_INDEX_TYPES,
+)
+
 load_dotenv()
 # ---- Constants ---- #
 CHROMA_PATH = "data\\vectorDB"
 DATA_SOURCE_PATH = "data\\knowledge"
 CHROMA_PATH = os.environ.get("CHROMA_PATH", "data\\vectorDB")
 IS_USING_IMAGE_RUNTIME = bool(os.environ.get("IS_USING_IMAGE_RUNTIME", False))
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", 256))
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", 32))
+EMBED_CONCURRENCY = int(os.environ.get("EMBED_CONCURRENCY", 4))
+MANIFEST_PATH = os.environ.get("MANIFEST_PATH", os.path.join(CHROMA_PATH, "ingest_manifest.json"))
+LEXICAL_INDEX_PATH = os.environ.get("LEXICAL_INDEX_PATH", os.path.join(CHROMA_PATH, "lexical_index.json.gz"))
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "chroma").lower()
+FAISS_INDEX_PATH = os.environ.get("FAISS_INDEX_PATH", os.path.join(CHROMA_PATH, "faiss"))
+FAISS_INDEX_TYPE = os.environ.get("FAISS_INDEX_TYPE", "flat").lower()
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", os.path.join(CHROMA_PATH, "snapshot"))
+SNAPSHOT_PRECISION = os.environ.get("SNAPSHOT_PRECISION", "float32").lower()
+# float16/int8 snapshots keep a float32 copy to rescore their top candidates; "0" trades that recall for size.
+SNAPSHOT_RESCORE = os.environ.get("SNAPSHOT_RESCORE", "1") != "0"
 CHROMA_DB_INSTANCE = None
+LEXICAL_INDEX_INSTANCE = None
+LEXICAL_INDEX_VERSION = {"generation": None, "reloading": False}
+LEXICAL_INDEX_LOCK = threading.Lock()
+RAG_TOP_K = int(os.environ.get("RAG_TOP_K", 3))
+HYBRID_CANDIDATES = int(os.environ.get("HYBRID_CANDIDATES", 10))
+RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", 12))
+MMR_LAMBDA = float(os.environ.get("MMR_LAMBDA", 0.5))
+RAG_CONTEXT_TOKENS = int(os.environ.get("RAG_CONTEXT_TOKENS", 1500))
 OLLAMA_MODEL_ID = "llama3.2"
 EMBEDDING_MODEL_ID = "nomic-embed-text"
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+QUERY_EMBEDDING_CACHE_PATH = os.environ.get("QUERY_EMBEDDING_CACHE_PATH")
+QUERY_EMBEDDING_CACHE = QueryEmbeddingCache(
+    EMBEDDING_MODEL_ID, max_entries=QUERY_EMBEDDING_CACHE_SIZE, persist_path=QUERY_EMBEDDING_CACHE_PATH
+)
+ANSWER_CACHE_SIMILARITY = float(os.environ.get("ANSWER_CACHE_SIMILARITY", 0.95))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", 3600))
+STORE_VERSION = {"mtime": None, "generation": None}
 
 # ---- Prompt ---- #
 RAG_PROMPT_TEMPLATE = """
@@ -88,13 +138,39 @@ class QueryResponse:
 
 
 def get_embedding_function():
-    embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL_ID)
+    embeddings = get_embeddings(EMBEDDING_MODEL_ID)
     return embeddings
 
 
-def load_documents():
-    document_loader = PyPDFDirectoryLoader(DATA_SOURCE_PATH)
-    return document_loader.load()
+def get_store_version():
+    # The manifest generation changes on every ingestion that touched the store. It is only
+    # re-read when the manifest file changes, so this is a single stat() per query.
+    try:
+        mtime = os.stat(MANIFEST_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if mtime != STORE_VERSION["mtime"]:
+        STORE_VERSION["generation"] = IngestManifest.load(MANIFEST_PATH).generation
+        STORE_VERSION["mtime"] = mtime
+    return STORE_VERSION["generation"]
+
+
+ANSWER_CACHE = AnswerCache(get_store_version, similarity_threshold=ANSWER_CACHE_SIMILARITY, ttl_seconds=ANSWER_CACHE_TTL)
+RAG_FLIGHTS = SingleFlight("rag")
+
+
+def get_query_embedding_function():
+    # Queries go through the LRU cache; ingestion keeps using the plain embedding function.
+    return CachedQueryEmbeddings(get_embedding_function(), QUERY_EMBEDDING_CACHE)
+
+
+def list_source_files():
+    source_files = []
+    for root, _dirs, files in os.walk(DATA_SOURCE_PATH):
+        for name in files:
+            if name.lower().endswith(".pdf") and not name.startswith("."):
+                source_files.append(os.path.join(root, name))
+    return sorted(source_files)
 
 
 def split_documents(documents: list[Document]):
@@ -107,9 +183,60 @@ def split_documents(documents: list[Document]):
     return text_splitter.split_documents(documents)
 
 
+def load_and_split_file(file_path: str) -> list[Document]:
+    # Runs inside a worker process: parse one PDF and split its pages there.
+    return split_documents(PyPDFLoader(file_path).load())
+
+
+def iter_file_chunks(file_paths: List[str], workers: int = 1):
+    # Yields the chunks of each file in input order, so chunk IDs stay stable whatever the worker count.
+    if workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield load_and_split_file(file_path)
+        return
+
+    # Only a small window of files is in flight, so parsed results never pile up ahead of the writer.
+    max_in_flight = workers * 2
+    pending_paths = iter(file_paths)
+    with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as executor:
+        in_flight = deque(executor.submit(load_and_split_file, path) for path in islice(pending_paths, max_in_flight))
+        while in_flight:
+            file_chunks = in_flight.popleft().result()
+            next_path = next(pending_paths, None)
+            if next_path is not None:
+                in_flight.append(executor.submit(load_and_split_file, next_path))
+            yield file_chunks
+
+
+def iter_chunks_with_ids(file_paths: List[str], workers: int = 1, chunk_ids_by_source: dict = None):
+    # IDs are computed per file, before batching, so a page never straddles two batches' numbering.
+    for file_chunks in iter_file_chunks(file_paths, workers):
+        for chunk in calculate_chunk_ids(file_chunks):
+            if chunk_ids_by_source is not None:
+                chunk_ids_by_source.setdefault(chunk.metadata.get("source"), []).append(chunk.metadata["id"])
+            yield chunk
+
+
+def batched(iterable: Iterable, batch_size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
 def get_db():
     global CHROMA_DB_INSTANCE
     if not CHROMA_DB_INSTANCE:
+        if VECTOR_STORE_BACKEND == "faiss":
+            # Opened in place and memory-mapped read-only, nothing to copy even in the image runtime.
+            CHROMA_DB_INSTANCE = FaissVectorStore(FAISS_INDEX_PATH, get_query_embedding_function())
+            return CHROMA_DB_INSTANCE
+        # A packed snapshot is opened in place; in the image runtime it replaces copying Chroma to /tmp.
+        use_snapshot = IS_USING_IMAGE_RUNTIME and SnapshotVectorStore.exists(SNAPSHOT_PATH)
+        if VECTOR_STORE_BACKEND == "snapshot" or use_snapshot:
+            CHROMA_DB_INSTANCE = SnapshotVectorStore(SNAPSHOT_PATH, get_query_embedding_function())
+            return CHROMA_DB_INSTANCE
+        if VECTOR_STORE_BACKEND != "chroma":
+            raise ValueError(f"Unknown vector store backend: {VECTOR_STORE_BACKEND}")
 
         # Hack needed for AWS Lambda's base Python image (to work with an updated version of SQLite).
         # In Lambda runtime, we need to copy ChromaDB to /tmp so it can have write permissions.
@@ -121,12 +248,116 @@ def get_db():
         # Prepare the DB.
         CHROMA_DB_INSTANCE = Chroma(
             persist_directory=get_runtime_chroma_path(),
-            embedding_function=get_embedding_function(),
+            embedding_function=get_query_embedding_function(),
         )
 
     return CHROMA_DB_INSTANCE
 
 
+def export_vector_snapshot(precision: str = SNAPSHOT_PRECISION, rescore: bool = SNAPSHOT_RESCORE):
+    db = Chroma(
+        persist_directory=CHROMA_PATH,
+        embedding_function=get_embedding_function(),
+    )
+    print(f"Exporting {precision} vector snapshot to {SNAPSHOT_PATH}")
+    exported = export_snapshot(db, SNAPSHOT_PATH, model=EMBEDDING_MODEL_ID, precision=precision, rescore=rescore)
+    print(f"✅ Snapshot exported with {exported} documents")
+
+
+def print_quantization_report(k: int = 10):
+    report = quantization_report(SNAPSHOT_PATH, k=k)
+    print(f"Recall@{k} against the float32 snapshot, vector files on disk:")
+    for precision, row in report.items():
+        size = f"{row['disk_bytes']:>12,} bytes ({row['bytes_per_vector']:.0f}/vector)"
+        if "rescored" not in row:
+            print(f"  {precision:<8} {size}  recall 1.000")
+            continue
+        print(f"  {precision:<8} {size}  recall {row['quantized_only']:.3f} without the float32 copy")
+        rescoring = row["disk_bytes_with_rescoring"]
+        print(f"  {'':<8} {rescoring:>12,} bytes with it, recall {row['rescored']:.3f} rescored")
+
+
+def export_faiss_index(index_type: str = FAISS_INDEX_TYPE):
+    db = Chroma(
+        persist_directory=CHROMA_PATH,
+        embedding_function=get_embedding_function(),
+    )
+    print(f"Building {index_type} FAISS index in {FAISS_INDEX_PATH}")
+    exported = build_faiss_index(db, FAISS_INDEX_PATH, index_type)
+    print(f"✅ FAISS index built with {exported} documents")
+
+
+def get_lexical_index():
+    global LEXICAL_INDEX_INSTANCE
+    # Loaded on the first query (the warm-up probe in the bot); the index file is only read, never copied.
+    # A re-ingestion bumps the manifest generation: the new index is then parsed in the background
+    # and swapped in, while queries keep using the previous one instead of waiting for the parse.
+    version = get_store_version()
+    with LEXICAL_INDEX_LOCK:
+        if LEXICAL_INDEX_INSTANCE is None:
+            LEXICAL_INDEX_INSTANCE = LexicalIndex.load(LEXICAL_INDEX_PATH)
+            LEXICAL_INDEX_VERSION["generation"] = version
+        elif version != LEXICAL_INDEX_VERSION["generation"] and not LEXICAL_INDEX_VERSION["reloading"]:
+            LEXICAL_INDEX_VERSION["reloading"] = True
+            threading.Thread(target=reload_lexical_index, args=(version,), name="lexical-reload", daemon=True).start()
+        return LEXICAL_INDEX_INSTANCE
+
+
+def reload_lexical_index(version):
+    global LEXICAL_INDEX_INSTANCE
+    try:
+        index = LexicalIndex.load(LEXICAL_INDEX_PATH)
+        with LEXICAL_INDEX_LOCK:
+            LEXICAL_INDEX_INSTANCE = index
+            LEXICAL_INDEX_VERSION["generation"] = version
+        print(f"🔎 Reloaded the lexical index for knowledge base generation {version}: {len(index)} chunks")
+    finally:
+        LEXICAL_INDEX_VERSION["reloading"] = False
+
+
+def hybrid_search(db, query_text: str, query_vector: List[float], k: int = RAG_TOP_K):
+    # Vector and BM25 candidates are fused with reciprocal rank fusion, so exact identifiers
+    # found lexically can outrank semantically similar but wrong chunks.
+    fetch = max(k, HYBRID_CANDIDATES)
+    vector_results = db.similarity_search_by_vector_with_relevance_scores(query_vector, k=fetch)
+    lexical_results = get_lexical_index().search(query_text, k=fetch)
+    if not lexical_results:
+        return vector_results[:k]
+
+    documents = {doc.metadata.get("id"): (doc, score) for doc, score in vector_results}
+    fused = reciprocal_rank_fusion(
+        [[doc.metadata.get("id") for doc, _score in vector_results], [doc_id for doc_id, _score in lexical_results]]
+    )[:k]
+
+    missing_ids = [doc_id for doc_id, _score in fused if doc_id not in documents]
+    if missing_ids:
+        found = db.get(ids=missing_ids, include=["documents", "metadatas"])
+        for doc_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+            documents[doc_id] = (Document(page_content=text, metadata=metadata), None)
+
+    return [documents[doc_id] for doc_id, _score in fused if doc_id in documents]
+
+
+def get_candidate_vectors(db, results):
+    ids = [doc.metadata.get("id") for doc, _score in results]
+    found = db.get(ids=ids, include=["embeddings"])
+    vectors = dict(zip(found["ids"], found["embeddings"]))
+    if any(doc_id not in vectors for doc_id in ids):
+        return None
+    return [vectors[doc_id] for doc_id in ids]
+
+
+def retrieve(db, query_text: str, query_vector: List[float], k: int = RAG_TOP_K):
+    # Over-fetch, then let MMR and overlap suppression pick k distinct pieces of evidence.
+    candidates = hybrid_search(db, query_text, query_vector, k=max(k, RERANK_CANDIDATES))
+    if len(candidates) <= 1:
+        return candidates
+    candidate_vectors = get_candidate_vectors(db, candidates)
+    if candidate_vectors is None:
+        return candidates[:k]
+    return rerank(query_vector, candidates, candidate_vectors, k, lambda_mult=MMR_LAMBDA)
+
+
 def copy_chroma_to_tmp():
     dst_chroma_path = get_runtime_chroma_path()
 
@@ -149,37 +380,127 @@ def get_runtime_chroma_path():
         return CHROMA_PATH
 
 
-def add_to_chroma(chunks: list[Document]):
-    # Load the existing database.
+def write_chunks(db: Chroma, lexical_index: LexicalIndex, chunks: list[Document]):
+    # `db` embeds through the EmbeddingPipeline, so `add_documents` sends bounded, concurrent,
+    # retried requests instead of a single one for the whole batch. Existing IDs are upserted.
+    db.add_documents(chunks, ids=[chunk.metadata["id"] for chunk in chunks])
+    lexical_index.add([chunk.metadata["id"] for chunk in chunks], [chunk.page_content for chunk in chunks])
+
+
+def add_to_chroma(
+    chunks: Iterable[Document],
+    batch_size: int = INGEST_BATCH_SIZE,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    embed_concurrency: int = EMBED_CONCURRENCY,
+):
+    # Chunks must already carry their IDs (see `iter_chunks_with_ids`); they are consumed lazily.
+    embedding_pipeline = EmbeddingPipeline(
+        get_embedding_function(), batch_size=embed_batch_size, max_in_flight=embed_concurrency
+    )
     db = Chroma(
         persist_directory=CHROMA_PATH,
-        embedding_function=get_embedding_function(),
+        embedding_function=embedding_pipeline,
     )
-
-    # Calculate Page IDs.
-    chunks_with_ids = calculate_chunk_ids(chunks)
-    for chunk in chunks:
-        print(f"Chunk Page Sample: {chunk.metadata['id']}\n{chunk.page_content}\n\n")
-
-    # Add or Update the documents.
-    existing_items = db.get(include=[])  # IDs are always included by default
-    existing_ids = set(existing_items["ids"])
-    print(f"Number of existing documents in DB: {len(existing_ids)}")
-
-    # Only add documents that don't exist in the DB.
-    new_chunks = []
-    for chunk in chunks_with_ids:
-        if chunk.metadata["id"] not in existing_ids:
-            new_chunks.append(chunk)
-
-    if len(new_chunks):
-        print(f"👉 Adding new documents: {len(new_chunks)}")
-        new_chunk_ids = [chunk.metadata["id"] for chunk in new_chunks]
-        db.add_documents(new_chunks, ids=new_chunk_ids)
+    lexical_index = LexicalIndex.load(LEXICAL_INDEX_PATH)
+
+    # The manifest decides which files are (re)ingested, so every chunk is upserted: an edited file
+    # keeps its chunk IDs, and skipping IDs already in the DB would keep the old text.
+    added = 0
+    for batch_number, batch in enumerate(batched(chunks, batch_size), start=1):
+        write_chunks(db, lexical_index, batch)
+        added += len(batch)
+        print(f"📦 Batch {batch_number}: {len(batch)} written ({embedding_pipeline.throughput:.1f} chunks/sec)")
+
+    embedding_pipeline.close()
+    lexical_index.save()
+    if added:
+        print(
+            f"👉 Added documents: {added} "
+            f"({embedding_pipeline.throughput:.1f} chunks/sec, {embedding_pipeline.retries} retries)"
+        )
     else:
         print("✅ No new documents to add")
 
 
+def delete_from_chroma(chunk_ids: List[str]):
+    if not chunk_ids:
+        return
+
+    db = Chroma(
+        persist_directory=CHROMA_PATH,
+        embedding_function=get_embedding_function(),
+    )
+    print(f"🗑️ Removing stale documents: {len(chunk_ids)}")
+    db.delete(ids=list(chunk_ids))
+
+    lexical_index = LexicalIndex.load(LEXICAL_INDEX_PATH)
+    lexical_index.remove(chunk_ids)
+    lexical_index.save()
+
+
+def rebuild_lexical_index(page_size: int = 1000):
+    # Deployments that predate the BM25 index (or an index written with an older tokenizer) have
+    # chunks in Chroma that the lexical index never saw; they are indexed from the collection.
+    if len(LexicalIndex.load(LEXICAL_INDEX_PATH)) or not os.path.exists(CHROMA_PATH):
+        return
+    db = Chroma(
+        persist_directory=CHROMA_PATH,
+        embedding_function=get_embedding_function(),
+    )
+    lexical_index = LexicalIndex(LEXICAL_INDEX_PATH)
+    offset = 0
+    while (page := db.get(limit=page_size, offset=offset, include=["documents"]))["ids"]:
+        lexical_index.add(page["ids"], page["documents"])
+        offset += len(page["ids"])
+    if len(lexical_index):
+        lexical_index.save()
+        print(f"🔎 Rebuilt the lexical index from the vector DB: {len(lexical_index)} chunks")
+
+
+def update_manifest(manifest: IngestManifest, plan, chunk_ids_by_source: dict):
+    for path in plan.to_ingest:
+        manifest.record(path, chunk_ids_by_source.get(path, []), plan.hashes.get(path))
+    for path in plan.deleted:
+        manifest.forget(path)
+    manifest.save()
+
+
+def ingest_knowledge_base(
+    workers: int = 1,
+    batch_size: int = INGEST_BATCH_SIZE,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    embed_concurrency: int = EMBED_CONCURRENCY,
+):
+    manifest = IngestManifest.load(MANIFEST_PATH)
+    plan = manifest.plan(list_source_files())
+    print(
+        f"Knowledge base: {len(plan.new)} new, {len(plan.changed)} changed, "
+        f"{len(plan.deleted)} deleted, {len(plan.unchanged)} unchanged"
+    )
+    rebuild_lexical_index()
+
+    if not plan.to_ingest and not plan.deleted:
+        manifest.save(bump_generation=False)
+        print("✅ Knowledge base is up to date")
+        return
+
+    # Chunks of changed and deleted files must go before the new versions are added.
+    delete_from_chroma(plan.stale_chunk_ids)
+
+    chunk_ids_by_source = {}
+    if plan.to_ingest:
+        chunks = iter_chunks_with_ids(plan.to_ingest, workers, chunk_ids_by_source)
+        add_to_chroma(chunks, batch_size, embed_batch_size, embed_concurrency)
+
+    update_manifest(manifest, plan, chunk_ids_by_source)
+
+    # FAISS indexes and snapshots are read-only exports of Chroma, refresh them whenever the store changed.
+    if VECTOR_STORE_BACKEND == "faiss":
+        export_faiss_index()
+    elif VECTOR_STORE_BACKEND == "snapshot":
+        export_vector_snapshot()
+
+
 def calculate_chunk_ids(chunks):
 
     # This will create IDs like "data/monopoly.pdf:6:2"
@@ -214,21 +535,91 @@ def clear_database():
         shutil.rmtree(CHROMA_PATH)
 
 
+def search_for_query(db, query_text: str, query_vector: List[float]):
+    results = retrieve(db, query_text, query_vector)
+    sources = [doc.metadata.get("id", None) for doc, _score in results]
+    return results, sources
+
+
+def build_rag_prompt(query_text: str, results) -> str:
+    context = pack_context(results, RAG_CONTEXT_TOKENS)
+    print(f"RAG context: {context.tokens}/{context.budget} tokens from {len(context.chunk_ids)} chunks")
+    prompt_template = ChatPromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
+    return prompt_template.format(context=context.text, question=query_text)
+
+
+def format_rag_answer(response_text: str, sources: List[str]) -> str:
+    return f"\nResponse:\n{response_text}\n\nSources: {sources}"
+
+
 def query_rag(query_text: str) -> QueryResponse:
+    # The same question asked while an answer is being generated waits for that answer.
+    return RAG_FLIGHTS.do(normalize_query(query_text), _query_rag, query_text)
+
+
+def _query_rag(query_text: str) -> QueryResponse:
     db = get_db()
 
     # Search the DB.
-    results = db.similarity_search_with_score(query_text, k=3)
-    context_text = "\n\n---\n\n".join([doc.page_content for doc, _score in results])
-    prompt_template = ChatPromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
-    prompt = prompt_template.format(context=context_text, question=query_text)
+    query_vector = db.embeddings.embed_query(query_text)
+    results, sources = search_for_query(db, query_text, query_vector)
+
+    # Same evidence and practically the same question: reuse the previous generation.
+    cached_answer = ANSWER_CACHE.get(sources, query_vector)
+    if cached_answer is not None:
+        return cached_answer
 
-    model = ChatOllama(model=OLLAMA_MODEL_ID, temperature=0)
+    prompt = build_rag_prompt(query_text, results)
+    model = get_chat_model(OLLAMA_MODEL_ID, temperature=0)
     response = model.invoke(prompt)
     response_text = response.content
 
-    sources = [doc.metadata.get("id", None) for doc, _score in results]
-    return f"\nResponse:\n{response_text}\n\nSources: {sources}"
+    answer = format_rag_answer(response_text, sources)
+    ANSWER_CACHE.put(sources, query_vector, answer)
+    return answer
+
+
+async def aquery_rag(query_text: str) -> str:
+    db = get_db()
+
+    # Embedding and generation use Ollama's async client; the local vector search runs in a thread.
+    query_vector = await db.embeddings.aembed_query(query_text)
+    results, sources = await asyncio.to_thread(search_for_query, db, query_text, query_vector)
+
+    cached_answer = ANSWER_CACHE.get(sources, query_vector)
+    if cached_answer is not None:
+        return cached_answer
+
+    prompt = build_rag_prompt(query_text, results)
+    model = get_chat_model(OLLAMA_MODEL_ID, temperature=0)
+    response = await model.ainvoke(prompt)
+
+    answer = format_rag_answer(response.content, sources)
+    ANSWER_CACHE.put(sources, query_vector, answer)
+    return answer
+
+
+def query_rag_many(query_texts: List[str], max_concurrency: int = 4) -> List[str]:
+    if not query_texts:
+        return []
+    db = get_db()
+
+    # One batched embedding request for every question not already cached.
+    query_vectors = db.embeddings.embed_queries(query_texts)
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(query_texts))) as executor:
+        searches = list(executor.map(search_for_query, [db] * len(query_texts), query_texts, query_vectors))
+
+    answers = [ANSWER_CACHE.get(sources, vector) for (_results, sources), vector in zip(searches, query_vectors)]
+    pending = [position for position, answer in enumerate(answers) if answer is None]
+    if pending:
+        prompts = [build_rag_prompt(query_texts[position], searches[position][0]) for position in pending]
+        model = get_chat_model(OLLAMA_MODEL_ID, temperature=0)
+        responses = model.batch(prompts, config={"max_concurrency": max_concurrency})
+        for position, response in zip(pending, responses):
+            sources = searches[position][1]
+            answers[position] = format_rag_answer(response.content, sources)
+            ANSWER_CACHE.put(sources, query_vectors[position], answers[position])
+    return answers
 
 
 def main():
@@ -236,15 +627,74 @@ def main():
     # Check if the database should be cleared (using the --clear flag).
     parser = argparse.ArgumentParser()
     parser.add_argument("--reset", action="store_true", help="Reset the database.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of processes used to parse and split PDFs.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INGEST_BATCH_SIZE,
+        help="Number of chunks embedded and written to the database per batch.",
+    )
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=EMBED_BATCH_SIZE,
+        help="Number of chunks sent to the embedding server per request.",
+    )
+    parser.add_argument(
+        "--embed-concurrency",
+        type=int,
+        default=EMBED_CONCURRENCY,
+        help="Maximum number of embedding requests in flight.",
+    )
+    parser.add_argument(
+        "--build-faiss",
+        choices=FAISS_INDEX_TYPES,
+        help="Export the Chroma DB to a memory-mapped FAISS index of the given type.",
+    )
+    parser.add_argument(
+        "--export-snapshot",
+        action="store_true",
+        help="Export the Chroma DB to a packed read-only snapshot that can be opened without copying.",
+    )
+    parser.add_argument(
+        "--snapshot-precision",
+        choices=["float32", "float16", "int8"],
+        default=SNAPSHOT_PRECISION,
+        help="Storage precision of the snapshot vectors scanned at query time.",
+    )
+    parser.add_argument(
+        "--snapshot-without-rescoring",
+        action="store_true",
+        help="Leave the float32 rescoring copy out of a float16/int8 snapshot (smaller, lower recall).",
+    )
+    parser.add_argument(
+        "--quantization-report",
+        action="store_true",
+        help="Compare float16/int8 recall against the float32 vectors of the exported snapshot.",
+    )
     args = parser.parse_args()
     if args.reset:
         print("✨ Clearing Database")
         clear_database()
 
-    # Create (or update) the data store.
-    documents = load_documents()
-    chunks = split_documents(documents)
-    add_to_chroma(chunks)
+    # Create (or update) the data store, only parsing files that are new or changed.
+    ingest_knowledge_base(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        embed_batch_size=args.embed_batch_size,
+        embed_concurrency=args.embed_concurrency,
+    )
+    if args.build_faiss:
+        export_faiss_index(args.build_faiss)
+    if args.export_snapshot:
+        export_vector_snapshot(args.snapshot_precision, SNAPSHOT_RESCORE and not args.snapshot_without_rescoring)
+    if args.quantization_report:
+        print_quantization_report()
     while True:
         preg = input("Mensaje: ")
         if preg.lower() == "exit":
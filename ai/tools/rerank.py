@@ -0,0 +1,108 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+"""
+Re-ranking of over-fetched retrieval candidates before they are packed into the RAG prompt.
+Maximal marginal relevance spreads the picks across distinct evidence, near-duplicate chunks are
+dropped, and the text shared by neighbouring chunks (the splitter's `chunk_overlap`) is only kept once.
+"""
+
+
+def maximal_marginal_relevance(
+    query_vector: np.ndarray, candidate_vectors: np.ndarray, k: int, lambda_mult: float = 0.5
+) -> List[int]:
+    if len(candidate_vectors) == 0 or k <= 0:
+        return []
+
+    candidates = candidate_vectors / (np.linalg.norm(candidate_vectors, axis=1, keepdims=True) + 1e-12)
+    query = query_vector / (np.linalg.norm(query_vector) + 1e-12)
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything already selected, updated incrementally.
+    redundancy = pairwise[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
+
+
+def shingles(text: str, size: int = 5) -> set:
+    words = text.split()
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    # Zipping the word list against itself shifted 0..size-1 yields every window of `size` words.
+    return {" ".join(window) for window in zip(*(words[offset:] for offset in range(size)))}
+
+
+def containment(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def strip_overlap(previous: str, text: str, min_overlap: int = 20, max_overlap: int = 600) -> str:
+    # Longest suffix of `previous` that starts `text`, as left behind by the splitter's chunk_overlap.
+    limit = min(len(previous), len(text), max_overlap)
+    for size in range(limit, min_overlap - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+    return text
+
+
+def parse_chunk_id(chunk_id: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    # "data/monopoly.pdf:6:2" -> ("data/monopoly.pdf:6", 2)
+    if not chunk_id or chunk_id.count(":") < 2:
+        return None, None
+    page_id, index = chunk_id.rsplit(":", 1)
+    return (page_id, int(index)) if index.isdigit() else (None, None)
+
+
+def rerank(
+    query_vector: List[float],
+    results: List[Tuple[Document, float]],
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    duplicate_threshold: float = 0.8,
+) -> List[Tuple[Document, float]]:
+    query = np.asarray(query_vector, dtype=np.float32)
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    order = maximal_marginal_relevance(query, vectors, len(results), lambda_mult)
+
+    picked, picked_shingles = [], []
+    for position in order:
+        document, score = results[position]
+        document_shingles = shingles(document.page_content)
+        if any(containment(document_shingles, other) >= duplicate_threshold for other in picked_shingles):
+            continue
+        picked.append((document, score))
+        picked_shingles.append(document_shingles)
+        if len(picked) == k:
+            break
+
+    # Neighbouring chunks of the same page repeat the overlap; keep it only in the earlier chunk.
+    texts = {}
+    for document, _score in picked:
+        page_id, index = parse_chunk_id(document.metadata.get("id"))
+        if page_id is not None:
+            texts[(page_id, index)] = document.page_content
+
+    reranked = []
+    for document, score in picked:
+        page_id, index = parse_chunk_id(document.metadata.get("id"))
+        previous = texts.get((page_id, index - 1)) if page_id is not None else None
+        if previous is not None:
+            document = Document(page_content=strip_overlap(previous, document.page_content), metadata=document.metadata)
+        reranked.append((document, score))
+    return reranked
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from .. import metrics
+
+"""
+Short-lived LRU cache of read-only tool results, keyed on (function name, normalized arguments), so
+the same Trello/GitHub data is not fetched again for every user who asks within a few seconds.
+Mutating tools invalidate the reads they affect. Hits, misses and invalidations are counted in
+`ai.metrics` under `tool_cache.*`.
+"""
+
+TOOL_CACHE_MAX_ENTRIES = int(os.environ.get("TOOL_CACHE_MAX_ENTRIES", 256))
+
+# Seconds a result stays fresh. Tools not listed here (writes, query_rag with its own cache) are never cached.
+TOOL_CACHE_TTLS = {
+    "get_trello_board_info": 30,
+    "get_list_cards": 30,
+    "search_card_descriptions": 30,
+    "get_latest_card": 15,
+    "list_user_repos": 300,
+    "list_branches": 120,
+    "show_commit_history": 60,
+    "print_repo_contents": 120,
+}
+
+TRELLO_READS = ("get_trello_board_info", "get_list_cards", "search_card_descriptions", "get_latest_card")
+# Tools with side effects; the reads they make stale are dropped after every call.
+MUTATING_TOOLS = ("add_card_to_list", "delete_card")
+INVALIDATES = {name: TRELLO_READS for name in MUTATING_TOOLS}
+
+# Arguments the tool itself matches case-insensitively (Trello list names, description search).
+# Everything else, e.g. GitHub paths, is case-sensitive and only has its whitespace collapsed.
+CASE_INSENSITIVE_ARGS = {"get_list_cards": ("list_id",), "search_card_descriptions": ("search_term",)}
+
+# Tools report failures as text or as {"success": False, ...}; those must not be served again from the cache.
+ERROR_PREFIXES = ("Error", "❌", "El tablero no está disponible")
+
+
+def is_failed_result(result: Any) -> bool:
+    # Empty results are not cached either: search_card_descriptions returns [] when Trello fails.
+    if isinstance(result, dict) and result.get("success") is False:
+        return True
+    if result is None or (isinstance(result, (list, dict, str)) and not result):
+        return True
+    return str(result).startswith(ERROR_PREFIXES)
+
+
+def normalize_args(function_name: str, function_args: dict) -> str:
+    case_insensitive = CASE_INSENSITIVE_ARGS.get(function_name, ())
+    normalized = {}
+    for key, value in function_args.items():
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if key in case_insensitive:
+                value = value.casefold()
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ToolResultCache:
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES, ttls: Optional[dict] = None):
+        self.max_entries = max_entries
+        self.ttls = TOOL_CACHE_TTLS if ttls is None else ttls
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a read that started before a write must not cache its result.
+        self.generation = 0
+
+    def is_cacheable(self, function_name: str) -> bool:
+        return self.ttls.get(function_name, 0) > 0
+
+    def get(self, function_name: str, function_args: dict) -> Optional[str]:
+        if not self.is_cacheable(function_name):
+            return None
+        key = (function_name, normalize_args(function_name, function_args))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                metrics.incr("tool_cache.misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr("tool_cache.hits")
+        metrics.incr(f"tool_cache.hits.{function_name}")
+        return entry[1]
+
+    def put(self, function_name: str, function_args: dict, result: Any, generation: Optional[int] = None):
+        # `result` is what the tool returned, checked for failure before it is stored as text.
+        if not self.is_cacheable(function_name) or is_failed_result(result):
+            return
+        key = (function_name, normalize_args(function_name, function_args))
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttls[function_name], str(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_after(self, function_name: str):
+        affected = INVALIDATES.get(function_name)
+        if not affected:
+            return
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if key[0] in affected]:
+                del self._entries[key]
+        metrics.incr("tool_cache.invalidations")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+TOOL_RESULT_CACHE = ToolResultCache()
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, List
+
+from termcolor import colored
+
+from .. import metrics
+from ..singleflight import SingleFlight
+from .tool_cache import MUTATING_TOOLS, TOOL_RESULT_CACHE, normalize_args
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+"""
+Runs the tool calls of one model turn concurrently on a shared, bounded thread pool. Every call
+gets its own timeout, results come back in the order the model asked for them, and the latency of
+each tool is recorded in `ai.metrics` under `tool.<name>`. Read-only results are served from the
+tool result cache when fresh.
+
+A thread cannot be cancelled once the call has started, so a call that times out keeps its worker
+until it returns. Those calls are counted as stuck; once TOOL_MAX_STUCK are stuck, new calls are
+refused right away instead of queueing behind them and timing out without ever running.
+"""
+
+TOOL_WORKERS = int(os.environ.get("TOOL_WORKERS", 8))
+TOOL_TIMEOUT_SECONDS = float(os.environ.get("TOOL_TIMEOUT_SECONDS", 20))
+# RAG answers run a local model, so they get more time than a Trello/GitHub round-trip.
+TOOL_TIMEOUTS = {"query_rag": float(os.environ.get("RAG_TOOL_TIMEOUT_SECONDS", 60))}
+TOOL_MAX_STUCK = int(os.environ.get("TOOL_MAX_STUCK", TOOL_WORKERS))
+
+_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+TOOL_FLIGHTS = SingleFlight("tool")
+_stuck = {"count": 0}
+_stuck_lock = threading.Lock()
+
+
+def tool_timeout(function_name: str) -> float:
+    return TOOL_TIMEOUTS.get(function_name, TOOL_TIMEOUT_SECONDS)
+
+
+def stuck_calls() -> int:
+    return _stuck["count"]
+
+
+def _mark_stuck(future):
+    with _stuck_lock:
+        _stuck["count"] += 1
+    future.add_done_callback(_unmark_stuck)
+
+
+def _unmark_stuck(_future):
+    with _stuck_lock:
+        _stuck["count"] -= 1
+
+
+def _timeout_message(function_name: str, future) -> str:
+    if future.cancel():
+        return f"Error: la herramienta {function_name} excedió el tiempo límite sin llegar a ejecutarse."
+    _mark_stuck(future)
+    if function_name in MUTATING_TOOLS:
+        # The write may still be applied: the model must not report it as failed, nor retry it blindly.
+        return (
+            f"Error: la herramienta {function_name} excedió el tiempo límite y sigue en curso; "
+            "su resultado es desconocido, puede haberse aplicado. Comprueba el estado antes de reintentarla."
+        )
+    return f"Error: la herramienta {function_name} excedió el tiempo límite."
+
+
+def _timed_call(function_name: str, function_to_call: Callable, function_args: dict):
+    generation = TOOL_RESULT_CACHE.generation
+    started = time.perf_counter()
+    try:
+        result = function_to_call(**function_args)
+    finally:
+        metrics.observe(f"tool.{function_name}", time.perf_counter() - started)
+        TOOL_RESULT_CACHE.invalidate_after(function_name)
+    TOOL_RESULT_CACHE.put(function_name, function_args, result, generation)
+    return str(result)
+
+
+def _shared_call(function_name: str, function_to_call: Callable, function_args: dict):
+    # Identical read-only calls in flight share one fetch. Writes always run, each call is intentional.
+    if not TOOL_RESULT_CACHE.is_cacheable(function_name):
+        return _timed_call(function_name, function_to_call, function_args)
+    key = (function_name, normalize_args(function_name, function_args))
+    return TOOL_FLIGHTS.do(key, _timed_call, function_name, function_to_call, function_args)
+
+
+def run_tool_calls(tool_calls, available_functions: Dict[str, Callable]) -> List[dict]:
+    started = time.perf_counter()
+    submitted = []
+    for tool_call in tool_calls:
+        function_name = tool_call.function.name
+        function_to_call = available_functions.get(function_name)
+        if function_to_call is None:
+            submitted.append((tool_call, None, f"Error: la herramienta {function_name} no existe."))
+            continue
+        try:
+            function_args = json.loads(tool_call.function.arguments or "{}")
+        except ValueError as e:
+            submitted.append((tool_call, None, f"Error: argumentos inválidos para {function_name}: {e}"))
+            continue
+        cached = TOOL_RESULT_CACHE.get(function_name, function_args)
+        if cached is not None:
+            submitted.append((tool_call, None, cached))
+            continue
+        if stuck_calls() >= TOOL_MAX_STUCK:
+            metrics.incr("tool.refused")
+            content = f"Error: la herramienta {function_name} no se ejecutó: hay demasiadas herramientas bloqueadas."
+            logger.error(colored(content, "red"))
+            submitted.append((tool_call, None, content))
+            continue
+        future = _executor.submit(_shared_call, function_name, function_to_call, function_args)
+        submitted.append((tool_call, future, None))
+
+    tool_messages = []
+    for tool_call, future, content in submitted:
+        function_name = tool_call.function.name
+        if future is not None:
+            # Timeouts count from submission, so waiting on earlier calls does not eat into later ones.
+            remaining = tool_timeout(function_name) - (time.perf_counter() - started)
+            try:
+                content = str(future.result(timeout=max(remaining, 0)))
+            except TimeoutError:
+                metrics.incr("tool.timeouts")
+                content = _timeout_message(function_name, future)
+                logger.error(colored(content, "red"))
+            except Exception as e:
+                metrics.incr("tool.errors")
+                content = f"Error al ejecutar {function_name}: {e}"
+                logger.error(colored(content, "red"))
+        tool_messages.append({"tool_call_id": tool_call.id, "role": "tool", "name": function_name, "content": content})
+
+    metrics.observe("tool.turn", time.perf_counter() - started)
+    return tool_messages
@@ -0,0 +1,476 @@
+import os
+import mmap
+import json
+import time
+import shutil
+import logging
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+"""
+Alternative read-only vector store backends for query time. Chroma stays the store written during
+ingestion; the backends here are exported from it and opened in place, memory-mapped, so several
+bot processes share a single copy of the index through the page cache.
+"""
+
+FAISS_INDEX_TYPES = ("flat", "ivf", "hnsw")
+EXPORT_PAGE_SIZE = 1000
+
+
+def iter_chroma_records(db, page_size: int = EXPORT_PAGE_SIZE):
+    # Pages through the Chroma collection so exporting never holds the whole DB in memory twice.
+    offset = 0
+    while True:
+        page = db.get(limit=page_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not page["ids"]:
+            return
+        yield page["ids"], np.asarray(page["embeddings"], dtype=np.float32), page["documents"], page["metadatas"]
+        offset += len(page["ids"])
+
+
+class DocumentFile:
+    """Chunk texts and metadata as JSON lines plus an offsets array, read through mmap on demand."""
+
+    DOCUMENTS_FILE = "documents.jsonl"
+    OFFSETS_FILE = "offsets.npy"
+    IDS_FILE = "ids.npy"
+    ID_POSITIONS_FILE = "id_positions.npy"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.offsets = np.load(os.path.join(directory, self.OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(directory, self.DOCUMENTS_FILE), "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Sorted IDs and their positions, written at export so lookups by ID never parse the records.
+        self._ids, self._id_positions = None, None
+        if os.path.exists(os.path.join(directory, self.IDS_FILE)):
+            self._ids = np.load(os.path.join(directory, self.IDS_FILE), mmap_mode="r")
+            self._id_positions = np.load(os.path.join(directory, self.ID_POSITIONS_FILE), mmap_mode="r")
+        self._positions = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def record(self, position: int) -> dict:
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return json.loads(self._data[start:end])
+
+    def document(self, position: int) -> Document:
+        record = self.record(position)
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def position(self, doc_id: str):
+        if self._ids is not None:
+            index = int(np.searchsorted(self._ids, doc_id))
+            if index < len(self._ids) and self._ids[index] == doc_id:
+                return int(self._id_positions[index])
+            return None
+        # Exports written before the ID index existed fall back to a map built from every record.
+        if self._positions is None:
+            self._positions = {self.record(position)["id"]: position for position in range(len(self))}
+        return self._positions.get(doc_id)
+
+    def get(self, ids: List[str] = None, include: List[str] = None, vector_at=None) -> dict:
+        result = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        for doc_id in ids or []:
+            position = self.position(doc_id)
+            if position is None:
+                continue
+            record = self.record(position)
+            result["ids"].append(record["id"])
+            result["documents"].append(record["text"])
+            result["metadatas"].append(record["metadata"])
+            if include and "embeddings" in include and vector_at is not None:
+                result["embeddings"].append(vector_at(position))
+        return result
+
+
+class DocumentFileWriter:
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._file = open(os.path.join(directory, f"{DocumentFile.DOCUMENTS_FILE}.tmp"), "wb")
+        self._offsets = [0]
+        self._ids = []
+
+    def write(self, doc_id: str, text: str, metadata: dict):
+        line = json.dumps({"id": doc_id, "text": text, "metadata": metadata}, ensure_ascii=False).encode("utf-8")
+        self._file.write(line + b"\n")
+        self._offsets.append(self._offsets[-1] + len(line) + 1)
+        self._ids.append(doc_id)
+
+    def close(self):
+        self._file.close()
+        offsets_path = os.path.join(self.directory, f"{DocumentFile.OFFSETS_FILE}.tmp.npy")
+        np.save(offsets_path, np.asarray(self._offsets, dtype=np.int64))
+        ids = np.asarray(self._ids, dtype=str)
+        order = np.argsort(ids, kind="stable")
+        np.save(os.path.join(self.directory, DocumentFile.IDS_FILE), ids[order])
+        np.save(os.path.join(self.directory, DocumentFile.ID_POSITIONS_FILE), order.astype(np.int64))
+        os.replace(
+            os.path.join(self.directory, f"{DocumentFile.DOCUMENTS_FILE}.tmp"),
+            os.path.join(self.directory, DocumentFile.DOCUMENTS_FILE),
+        )
+        os.replace(offsets_path, os.path.join(self.directory, DocumentFile.OFFSETS_FILE))
+
+
+class FaissVectorStore:
+    INDEX_FILE = "faiss.index"
+
+    def __init__(self, directory: str, embedding_function: Embeddings):
+        import faiss
+
+        # Resolved once, so every file is opened from the same build even if a new one is published meanwhile.
+        self.directory = directory = os.path.realpath(directory)
+        self.embeddings = embedding_function
+        index_path = os.path.join(directory, self.INDEX_FILE)
+        # IO_FLAG_MMAP only maps the inverted lists of IVF indexes; flat and HNSW storage needs
+        # IO_FLAG_MMAP_IFC, otherwise it is silently read into private memory.
+        self.load_mode = "IO_FLAG_MMAP" if self.is_ivf(index_path) else "IO_FLAG_MMAP_IFC"
+        try:
+            self.index = faiss.read_index(index_path, getattr(faiss, self.load_mode) | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            # Some index types cannot be memory-mapped; fall back to a regular read.
+            logger.error(f"FAISS index {index_path} cannot be memory-mapped ({e}), reading it into memory")
+            self.load_mode = "read"
+            self.index = faiss.read_index(index_path)
+        print(f"FAISS index opened with {self.load_mode}: {self.index.ntotal} vectors")
+        self.documents = DocumentFile(directory)
+        if hasattr(self.index, "nprobe"):
+            self.index.nprobe = int(os.environ.get("FAISS_NPROBE", 16))
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = int(os.environ.get("FAISS_EF_SEARCH", 64))
+
+    @staticmethod
+    def is_ivf(index_path: str) -> bool:
+        # Every IVF index type's fourcc starts with "Iw" (IndexIVFFlat is "IwFl").
+        with open(index_path, "rb") as file:
+            return file.read(2) == b"Iw"
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding: List[float], k: int = 4):
+        query = np.asarray([embedding], dtype=np.float32)
+        query /= np.linalg.norm(query, axis=1, keepdims=True) + 1e-12
+        scores, positions = self.index.search(query, k)
+        return [
+            (self.documents.document(int(position)), float(score))
+            for score, position in zip(scores[0], positions[0])
+            if position >= 0
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embeddings.embed_query(query), k)
+
+    def get(self, ids: List[str] = None, include: List[str] = None) -> dict:
+        # Stored vectors come back through `reconstruct` (IVF indexes get a direct map at build time).
+        return self.documents.get(ids, include, vector_at=lambda position: self.index.reconstruct(position))
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Symmetric scalar quantization with one scale per vector.
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class SnapshotVectorStore:
+    """
+    Packed, read-only snapshot: normalized float32 vectors in a .npy file plus the document file.
+    Everything is memory-mapped, so opening it costs the same whatever the corpus size.
+
+    With `float16` or `int8` precision the scan runs over the quantized copy and only the top
+    candidates are rescored against the float32 vectors, which then stay cold on disk. Exported
+    without that rescoring copy, the snapshot only holds the codes and is a fraction of the size.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    FLOAT16_FILE = "vectors_f16.npy"
+    INT8_FILE = "vectors_i8.npy"
+    SCALES_FILE = "scales.npy"
+    INFO_FILE = "snapshot.json"
+    PRECISIONS = ("float32", "float16", "int8")
+    SCAN_BLOCK_SIZE = 65536
+
+    def __init__(self, directory: str, embedding_function: Embeddings, rescore_factor: int = 4):
+        self.directory = directory = os.path.realpath(directory)
+        self.embeddings = embedding_function
+        self.rescore_factor = rescore_factor
+        with open(os.path.join(directory, self.INFO_FILE), "r", encoding="utf-8") as file:
+            self.info = json.load(file)
+        self.precision = self.info.get("precision", "float32")
+        self.vectors = self._load(self.VECTORS_FILE) if self.info.get("rescore", True) else None
+        self.codes, self.scales = None, None
+        if self.precision == "float16":
+            self.codes = self._load(self.FLOAT16_FILE)
+        elif self.precision == "int8":
+            self.codes = self._load(self.INT8_FILE)
+            self.scales = self._load(self.SCALES_FILE)
+        self.documents = DocumentFile(directory)
+
+    def _load(self, name: str):
+        path = os.path.join(self.directory, name)
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, cls.INFO_FILE))
+
+    def _scan(self, query: np.ndarray) -> np.ndarray:
+        if self.codes is None:
+            return self.vectors @ query
+        # Quantized codes are widened block by block, so a query never materializes a float32 copy.
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), self.SCAN_BLOCK_SIZE):
+            stop = min(start + self.SCAN_BLOCK_SIZE, len(self.codes))
+            scores[start:stop] = np.asarray(self.codes[start:stop], dtype=np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def search(self, embedding: List[float], k: int, rescore: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+        scores = self._scan(query)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if self.codes is None or not rescore or self.vectors is None:
+            top = self._top(scores, k)
+            return top, scores[top]
+
+        candidates = np.sort(self._top(scores, min(k * self.rescore_factor, len(scores))))
+        exact = np.asarray(self.vectors[candidates]) @ query
+        order = np.argsort(-exact)[:k]
+        return candidates[order], exact[order]
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding: List[float], k: int = 4):
+        positions, scores = self.search(embedding, k)
+        return [(self.documents.document(int(position)), float(score)) for position, score in zip(positions, scores)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embeddings.embed_query(query), k)
+
+    def vector(self, position: int) -> np.ndarray:
+        if self.vectors is not None:
+            return np.asarray(self.vectors[position])
+        # Without the rescoring copy the stored vector is approximated from its codes.
+        vector = np.asarray(self.codes[position], dtype=np.float32)
+        return vector * self.scales[position] if self.scales is not None else vector
+
+    def get(self, ids: List[str] = None, include: List[str] = None) -> dict:
+        return self.documents.get(ids, include, vector_at=self.vector)
+
+
+def write_snapshot(records, total: int, directory: str, model: str = None, precision: str = "float32", rescore: bool = True):
+    """`records` yields (ids, vectors, texts, metadatas) pages, as `iter_chroma_records` does.
+
+    `rescore=False` drops the float32 copy that quantized snapshots rescore their top candidates with.
+    """
+    if precision not in SnapshotVectorStore.PRECISIONS:
+        raise ValueError(f"Unknown snapshot precision: {precision}")
+    rescore = rescore or precision == "float32"
+
+    tmp_directory = f"{directory}.tmp"
+    writer = DocumentFileWriter(tmp_directory)
+    vectors_path = os.path.join(tmp_directory, SnapshotVectorStore.VECTORS_FILE)
+    vectors_file, codes_file, scales_file = None, None, None
+    count, dimension = 0, None
+
+    # Vectors are streamed into preallocated memmaps page by page, the DB is never held in memory.
+    for ids, vectors, texts, metadatas in records:
+        if dimension is None:
+            dimension = vectors.shape[1]
+            if rescore:
+                shape = (total, dimension)
+                vectors_file = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=shape)
+            if precision == "float16":
+                codes_path = os.path.join(tmp_directory, SnapshotVectorStore.FLOAT16_FILE)
+                codes_file = np.lib.format.open_memmap(codes_path, mode="w+", dtype=np.float16, shape=(total, dimension))
+            elif precision == "int8":
+                codes_path = os.path.join(tmp_directory, SnapshotVectorStore.INT8_FILE)
+                scales_path = os.path.join(tmp_directory, SnapshotVectorStore.SCALES_FILE)
+                codes_file = np.lib.format.open_memmap(codes_path, mode="w+", dtype=np.int8, shape=(total, dimension))
+                scales_file = np.lib.format.open_memmap(scales_path, mode="w+", dtype=np.float32, shape=(total,))
+
+        vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+        page = slice(count, count + len(ids))
+        if rescore:
+            vectors_file[page] = vectors
+        if precision == "float16":
+            codes_file[page] = vectors.astype(np.float16)
+        elif precision == "int8":
+            codes_file[page], scales_file[page] = quantize_int8(vectors)
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            writer.write(doc_id, text, metadata)
+        count += len(ids)
+    writer.close()
+
+    if dimension is None:
+        raise ValueError("The vector store is empty, nothing to export")
+    for memmap in (vectors_file, codes_file, scales_file):
+        if memmap is not None:
+            memmap.flush()
+    del vectors_file, codes_file, scales_file
+
+    with open(os.path.join(tmp_directory, SnapshotVectorStore.INFO_FILE), "w", encoding="utf-8") as file:
+        info = {"count": count, "dimension": dimension, "model": model, "precision": precision, "rescore": rescore}
+        json.dump(info, file)
+    replace_directory(tmp_directory, directory)
+    return count
+
+
+def export_snapshot(db, directory: str, model: str = None, precision: str = "float32", rescore: bool = True):
+    return write_snapshot(iter_chroma_records(db), db._collection.count(), directory, model, precision, rescore)
+
+
+def iter_snapshot_records(store: SnapshotVectorStore, page_size: int = EXPORT_PAGE_SIZE):
+    for start in range(0, len(store.vectors), page_size):
+        stop = min(start + page_size, len(store.vectors))
+        records = [store.documents.record(position) for position in range(start, stop)]
+        yield (
+            [record["id"] for record in records],
+            np.asarray(store.vectors[start:stop], dtype=np.float32),
+            [record["text"] for record in records],
+            [record["metadata"] for record in records],
+        )
+
+
+def recall_at_k(vectors: np.ndarray, candidate: SnapshotVectorStore, queries: np.ndarray, k: int = 10) -> dict:
+    """Fraction of the exact float32 top-k that `candidate` returns, with and without rescoring."""
+    totals = {"rescored": 0.0, "quantized_only": 0.0}
+    for query in queries:
+        query = query / (np.linalg.norm(query) + 1e-12)
+        expected = set(np.argsort(-(vectors @ query))[:k].tolist())
+        for name, rescore in (("rescored", True), ("quantized_only", False)):
+            found = set(candidate.search(query, k, rescore=rescore)[0].tolist())
+            totals[name] += len(expected & found) / len(expected)
+    return {name: total / len(queries) for name, total in totals.items()}
+
+
+def quantization_report(directory: str, k: int = 10, sample: int = 200, seed: int = 0) -> dict:
+    # Queries are perturbed copies of stored vectors, so each one has a non-trivial neighbourhood.
+    reference = SnapshotVectorStore(directory, None)
+    if reference.vectors is None:
+        raise ValueError("The quantization report needs a snapshot exported with its float32 vectors")
+    vectors = np.asarray(reference.vectors)
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(len(vectors), size=min(sample, len(vectors)), replace=False)
+    queries = vectors[positions] + rng.normal(0, 0.05, size=(len(positions), vectors.shape[1])).astype(np.float32)
+
+    # Sizes are what the files take on disk; the document file is the same for every precision.
+    vector_bytes = file_size(directory, SnapshotVectorStore.VECTORS_FILE)
+    report = {"float32": {"bytes_per_vector": vector_bytes / len(vectors), "disk_bytes": vector_bytes}}
+    for precision in ("float16", "int8"):
+        with tempfile.TemporaryDirectory() as tmp_root:
+            tmp_directory = os.path.join(tmp_root, "snapshot")
+            write_snapshot(iter_snapshot_records(reference), len(vectors), tmp_directory, precision=precision)
+            candidate = SnapshotVectorStore(tmp_directory, None)
+            names = (SnapshotVectorStore.FLOAT16_FILE, SnapshotVectorStore.INT8_FILE, SnapshotVectorStore.SCALES_FILE)
+            code_bytes = sum(file_size(tmp_directory, name) for name in names)
+            report[precision] = {
+                "bytes_per_vector": code_bytes / len(vectors),
+                "disk_bytes": code_bytes,
+                "disk_bytes_with_rescoring": code_bytes + file_size(tmp_directory, SnapshotVectorStore.VECTORS_FILE),
+                **recall_at_k(vectors, candidate, queries, k),
+            }
+            del candidate
+    return report
+
+
+def file_size(directory: str, name: str) -> int:
+    path = os.path.join(directory, name)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def build_faiss_index(db, directory: str, index_type: str = "flat", hnsw_m: int = 32):
+    import faiss
+
+    if index_type not in FAISS_INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type: {index_type}")
+
+    tmp_directory = f"{directory}.tmp"
+    writer = DocumentFileWriter(tmp_directory)
+    vector_pages = []
+    for ids, vectors, texts, metadatas in iter_chroma_records(db):
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            writer.write(doc_id, text, metadata)
+        vector_pages.append(vectors)
+    writer.close()
+
+    if not vector_pages:
+        raise ValueError("The vector store is empty, nothing to export")
+    vectors = np.concatenate(vector_pages)
+    # Cosine similarity through inner product on normalized vectors.
+    faiss.normalize_L2(vectors)
+    dimension = vectors.shape[1]
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+    else:
+        nlist = max(1, min(int(4 * np.sqrt(len(vectors))), len(vectors) // 39 or 1))
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+    index.add(vectors)
+    if index_type == "ivf":
+        # Lets `reconstruct` return stored vectors, which re-ranking needs.
+        index.make_direct_map()
+
+    faiss.write_index(index, os.path.join(tmp_directory, FaissVectorStore.INDEX_FILE))
+    replace_directory(tmp_directory, directory)
+    return len(vectors)
+
+
+def replace_directory(src: str, dst: str):
+    """Publishes the finished build in `src` at `dst` in a single step.
+
+    `dst` is a symlink to the current build (`<dst>.<n>` next to it), re-pointed with one os.replace,
+    so a store opened at any moment sees either the previous build or the new one, never a mix. The
+    previous build is kept until the next publish, for readers that resolved it just before the swap.
+    Where symlinks cannot be created (Windows without developer mode), `dst` is a plain directory
+    swapped with two renames: a reader may then briefly find no store, but never a half-written one.
+    """
+    build = f"{dst}.{time.time_ns()}"
+    os.replace(src, build)
+    link = f"{build}.link"
+    try:
+        os.symlink(os.path.basename(build), link, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        swap_directory(build, dst)
+        return
+    if os.path.isdir(dst) and not os.path.islink(dst):
+        # A store published before builds were versioned; it becomes the previous build.
+        os.replace(dst, f"{dst}.0")
+    previous = os.path.realpath(dst) if os.path.islink(dst) else f"{dst}.0"
+    os.replace(link, dst)
+
+    parent, prefix = os.path.split(os.path.abspath(dst))
+    keep = {os.path.basename(build), os.path.basename(previous)}
+    for name in os.listdir(parent):
+        head, _dot, suffix = name.partition(f"{prefix}.")
+        if not head and suffix.isdigit() and name not in keep:
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def swap_directory(src: str, dst: str):
+    old = f"{dst}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(dst):
+        os.replace(dst, old)
+    os.replace(src, dst)
+    shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,110 @@
+import os
+import time
+import logging
+import threading
+
+from termcolor import colored
+
+from . import metrics, tokens
+from .clients import OLLAMA_KEEP_ALIVE, get_backend_pool, get_embeddings, get_ollama_client
+from .tools import rag
+from .providers.router import ANSWER_MODELS, OLLAMA_CHAT_MODEL, TOOL_ROUTER_MODEL
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+"""
+Background warm-up run at bot startup: loads the chat and embedding models into Ollama with the
+configured keep-alive, opens the vector store and runs a probe query, so the first Slack user
+does not pay the cold-start cost. A failed step is logged and the bot becomes ready anyway, marked
+degraded in `warmup_status()`. The tiktoken encoding (which may have to be downloaded) is loaded
+last, prompts are budgeted with the estimate until then. Ollama's OpenAI-compatible endpoint
+resets the keep-alive to the server default, so the models can optionally be re-pinned every
+WARMUP_REFRESH_SECONDS.
+"""
+WARMUP_REFRESH_SECONDS = float(os.environ.get("WARMUP_REFRESH_SECONDS", 0))
+WARMUP_PROBE_QUERY = os.environ.get("WARMUP_PROBE_QUERY", "warm up")
+
+_ready = threading.Event()
+_status = {"chat_model": False, "embedding_model": False, "vector_store": False, "tokenizer": False, "errors": []}
+_thread = None
+
+
+def _failed(step: str, error: Exception) -> str:
+    message = f"{step}: {error}"
+    logger.error(colored(f"Warm-up step failed, {message}", "red"))
+    return message
+
+
+def load_models() -> list:
+    # Every backend of the pool may serve the next request, so each one loads every model a user can
+    # pick in App Home as well. An empty prompt makes Ollama load the model without generating anything.
+    # A model that fails to load (e.g. not pulled) is reported and the others are still loaded.
+    errors = []
+    chat_models = {rag.OLLAMA_MODEL_ID, OLLAMA_CHAT_MODEL, TOOL_ROUTER_MODEL, *ANSWER_MODELS} - {""}
+    for backend in get_backend_pool().backends:
+        for model in sorted(chat_models):
+            try:
+                get_ollama_client(backend.url).generate(model=model, prompt="", keep_alive=OLLAMA_KEEP_ALIVE)
+            except Exception as e:
+                errors.append(_failed(f"loading {model} on {backend.name}", e))
+    _status["chat_model"] = not errors
+    embedding_errors = []
+    for backend in get_backend_pool().backends:
+        try:
+            get_embeddings(rag.EMBEDDING_MODEL_ID, backend.url).embed_query(WARMUP_PROBE_QUERY)
+        except Exception as e:
+            embedding_errors.append(_failed(f"loading {rag.EMBEDDING_MODEL_ID} on {backend.name}", e))
+    _status["embedding_model"] = not embedding_errors
+    return errors + embedding_errors
+
+
+def open_vector_store():
+    db = rag.get_db()
+    query_vector = db.embeddings.embed_query(WARMUP_PROBE_QUERY)
+    rag.search_for_query(db, WARMUP_PROBE_QUERY, query_vector)
+    _status["vector_store"] = True
+
+
+def warm_up():
+    # Every step runs even if an earlier one failed, and the bot is marked ready at the end either
+    # way: requests are better served cold (or degraded) than answered with "warming up" forever.
+    started = time.perf_counter()
+    errors = load_models()
+    try:
+        open_vector_store()
+    except Exception as e:
+        errors.append(_failed("opening the vector store", e))
+    _status["errors"] = errors
+    _ready.set()
+    elapsed = time.perf_counter() - started
+    metrics.observe("warmup.seconds", elapsed)
+    if errors:
+        metrics.incr("warmup.errors", len(errors))
+        print(colored(f"Warm-up finished in {elapsed:.1f}s with {len(errors)} failed step(s), running degraded", "yellow"))
+    else:
+        print(colored(f"Warm-up finished in {elapsed:.1f}s, models and vector store are ready", "green"))
+    _status["tokenizer"] = tokens.load_tokenizer()
+
+
+def _run():
+    warm_up()
+    while WARMUP_REFRESH_SECONDS > 0:
+        time.sleep(WARMUP_REFRESH_SECONDS)
+        load_models()
+
+
+def start_warmup() -> threading.Thread:
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _thread.start()
+    return _thread
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def warmup_status() -> dict:
+    return {"ready": is_ready(), "degraded": bool(_status["errors"]), **_status}
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
 from listeners import register_listeners
+from ai.warmup import start_warmup
+from ai.metrics_report import start_metrics_log
 from termcolor import colored
 
 # Load environment variables
@@ -36,6 +38,9 @@ register_listeners(app)
 if __name__ == "__main__":
     try:
         print(colored("\nStarting Slack bot...", "cyan"))
+        # Models and vector store load in the background while the Socket Mode connection opens.
+        start_warmup()
+        start_metrics_log()
         handler = SocketModeHandler(app, os.getenv("SLACK_APP_TOKEN"))
         handler.start()
     except Exception as e:
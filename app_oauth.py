@@ -8,6 +8,8 @@ from slack_sdk.oauth.installation_store import FileInstallationStore
 from slack_sdk.oauth.state_store import FileOAuthStateStore
 
 from listeners import register_listeners
+from ai.warmup import start_warmup
+from ai.metrics_report import start_metrics_log
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -47,4 +49,6 @@ register_listeners(app)
 
 # Start Bolt app
 if __name__ == "__main__":
+    start_warmup()
+    start_metrics_log()
     app.start(3000)
@@ -2,8 +2,11 @@ from ai.providers import get_provider_response
 from logging import Logger
 from slack_sdk import WebClient
 from slack_bolt import Say
-from ..listener_utils.listener_constants import DEFAULT_LOADING_TEXT, MENTION_WITHOUT_TEXT
+from ai.warmup import is_ready
+from state_store.get_conversation_store import conversation_key
+from ..listener_utils.listener_constants import DEFAULT_LOADING_TEXT, WARMING_UP_LOADING_TEXT, MENTION_WITHOUT_TEXT
 from ..listener_utils.parse_conversation import parse_conversation
+from ..listener_utils.stream_renderer import SlackStreamRenderer
 
 """
 Handles the event when the app is mentioned in a Slack channel, retrieves the conversation context,
@@ -27,9 +30,16 @@ def app_mentioned_callback(client: WebClient, event: dict, logger: Logger, say:
         conversation_context = parse_conversation(conversation[:-1])
 
         if text:
-            waiting_message = say(text=DEFAULT_LOADING_TEXT, thread_ts=thread_ts)
-            response = get_provider_response(user_id, text, conversation_context)
-            client.chat_update(channel=channel_id, ts=waiting_message["ts"], text=response)
+            waiting_message = say(text=DEFAULT_LOADING_TEXT if is_ready() else WARMING_UP_LOADING_TEXT, thread_ts=thread_ts)
+            with SlackStreamRenderer(client, channel_id, waiting_message["ts"], logger) as renderer:
+                response = get_provider_response(
+                    user_id,
+                    text,
+                    conversation_context,
+                    conversation_id=conversation_key(user_id, channel_id, thread_ts),
+                    on_token=renderer.append,
+                )
+                renderer.finish(response)
         else:
             response = MENTION_WITHOUT_TEXT
             client.chat_update(channel=channel_id, ts=waiting_message["ts"], text=response)
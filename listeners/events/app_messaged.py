@@ -3,8 +3,11 @@ from ai.providers import get_provider_response
 from logging import Logger
 from slack_bolt import Say
 from slack_sdk import WebClient
-from ..listener_utils.listener_constants import DEFAULT_LOADING_TEXT
+from ai.warmup import is_ready
+from state_store.get_conversation_store import conversation_key
+from ..listener_utils.listener_constants import DEFAULT_LOADING_TEXT, WARMING_UP_LOADING_TEXT
 from ..listener_utils.parse_conversation import parse_conversation
+from ..listener_utils.stream_renderer import SlackStreamRenderer
 
 """
 Handles the event when a direct message is sent to the bot, retrieves the conversation context,
@@ -26,9 +29,17 @@ def app_messaged_callback(client: WebClient, event: dict, logger: Logger, say: S
                 conversation = client.conversations_replies(channel=channel_id, limit=10, ts=thread_ts)["messages"]
                 conversation_context = parse_conversation(conversation[:-1])
 
-            waiting_message = say(text=DEFAULT_LOADING_TEXT, thread_ts=thread_ts)
-            response = get_provider_response(user_id, text, conversation_context, DM_SYSTEM_CONTENT)
-            client.chat_update(channel=channel_id, ts=waiting_message["ts"], text=response)
+            waiting_message = say(text=DEFAULT_LOADING_TEXT if is_ready() else WARMING_UP_LOADING_TEXT, thread_ts=thread_ts)
+            with SlackStreamRenderer(client, channel_id, waiting_message["ts"], logger) as renderer:
+                response = get_provider_response(
+                    user_id,
+                    text,
+                    conversation_context,
+                    DM_SYSTEM_CONTENT,
+                    conversation_id=conversation_key(user_id, channel_id, thread_ts),
+                    on_token=renderer.append,
+                )
+                renderer.finish(response)
     except Exception as e:
         logger.error(e)
         client.chat_update(channel=channel_id, ts=waiting_message["ts"], text=f"Received an error from Bolty:\n{e}")
@@ -12,3 +12,4 @@ Create a quick summary of the conversaton in this channel to cath up the user.
 Don't use user names in your response.
 """
 DEFAULT_LOADING_TEXT = "Thinking..."
+WARMING_UP_LOADING_TEXT = "Thinking... (models are still warming up, this first answer may take a bit longer)"
@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+from logging import Logger
+from typing import Optional
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+"""
+Progressively renders a streamed LLM answer into the "Thinking..." placeholder message. Tokens are
+buffered and flushed by a background thread. Updates are spaced at least STREAM_UPDATE_SECONDS
+apart per channel, shared by every answer streaming into that channel, so `chat_update` stays within
+Slack's per-channel rate limits however many answers are in progress. When Slack answers
+`ratelimited`, the channel backs off for the Retry-After it sent.
+"""
+
+STREAM_UPDATE_SECONDS = float(os.environ.get("STREAM_UPDATE_SECONDS", 1.0))
+STREAM_FINAL_RETRIES = int(os.environ.get("STREAM_FINAL_RETRIES", 3))
+STREAM_CURSOR = " ▌"
+
+
+class ChannelThrottle:
+    """Hands out update slots per channel, STREAM_UPDATE_SECONDS apart, and records Slack backoffs."""
+
+    def __init__(self, interval: float = STREAM_UPDATE_SECONDS):
+        self.interval = interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, channel_id: str) -> float:
+        # Returns how long to wait before the reserved update may be sent.
+        with self._lock:
+            now = time.monotonic()
+            if len(self._next) > 1024:
+                self._next = {channel: at for channel, at in self._next.items() if at > now}
+            at = max(now, self._next.get(channel_id, 0.0))
+            self._next[channel_id] = at + self.interval
+            return at - now
+
+    def backoff(self, channel_id: str, seconds: float):
+        with self._lock:
+            self._next[channel_id] = max(self._next.get(channel_id, 0.0), time.monotonic() + seconds)
+
+
+CHANNEL_THROTTLE = ChannelThrottle()
+
+
+def retry_after(error: SlackApiError) -> Optional[float]:
+    response = error.response
+    if getattr(response, "status_code", None) != 429:
+        return None
+    return float((getattr(response, "headers", None) or {}).get("Retry-After", 1))
+
+
+class SlackStreamRenderer:
+    def __init__(
+        self,
+        client: WebClient,
+        channel_id: str,
+        ts: str,
+        logger: Optional[Logger] = None,
+        throttle: ChannelThrottle = CHANNEL_THROTTLE,
+    ):
+        self.client = client
+        self.channel_id = channel_id
+        self.ts = ts
+        self.logger = logger
+        self.throttle = throttle
+        self.updates = 0
+        self._text = ""
+        self._rendered = ""
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="slack-stream", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def append(self, token: str):
+        with self._lock:
+            self._text += token
+        self._dirty.set()
+
+    def finish(self, text: Optional[str] = None):
+        # The final update always goes out, with the provider's complete answer (or error message),
+        # in the channel's next slot and retried after a rate limit.
+        self.stop()
+        final_text = text if text is not None else self._text
+        if not final_text or final_text == self._rendered:
+            return
+        for _attempt in range(STREAM_FINAL_RETRIES + 1):
+            time.sleep(self.throttle.reserve(self.channel_id))
+            if self._update(final_text) is not False:
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self._dirty.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            if self._stopped.is_set():
+                return
+            self._dirty.clear()
+            # Whatever arrives while waiting for the channel's slot is coalesced into this update.
+            if self._stopped.wait(self.throttle.reserve(self.channel_id)):
+                return
+            with self._lock:
+                text = self._text
+            if text.strip() and self._update(text + STREAM_CURSOR) is False:
+                # Rate limited: send the latest text again once the backoff is over.
+                self._dirty.set()
+
+    def _update(self, text: str) -> Optional[bool]:
+        # True when sent, False when rate limited (worth retrying), None for any other failure.
+        try:
+            self.client.chat_update(channel=self.channel_id, ts=self.ts, text=text)
+            self._rendered = text
+            self.updates += 1
+            return True
+        except SlackApiError as e:
+            seconds = retry_after(e)
+            if self.logger:
+                self.logger.error(e)
+            if seconds is None:
+                return None
+            self.throttle.backoff(self.channel_id, seconds)
+            return False
+        except Exception as e:
+            if self.logger:
+                self.logger.error(e)
+            return None
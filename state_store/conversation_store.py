@@ -0,0 +1,47 @@
+import threading
+from collections import OrderedDict
+from typing import List
+
+
+class ConversationStore:
+    """Chat history per Slack conversation (channel + thread), bounded to the last `max_turns` turns."""
+
+    def get_history(self, conversation_id: str) -> List[dict]:
+        raise NotImplementedError()
+
+    def append_turn(self, conversation_id: str, messages: List[dict]):
+        raise NotImplementedError()
+
+    def clear(self, conversation_id: str):
+        raise NotImplementedError()
+
+
+class MemoryConversationStore(ConversationStore):
+    def __init__(self, *, max_turns: int = 10, max_conversations: int = 500):
+        self.max_turns = max_turns
+        self.max_conversations = max_conversations
+        # conversation_id -> list of turns, each turn being the list of messages it added.
+        self._conversations: "OrderedDict[str, List[List[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_history(self, conversation_id: str) -> List[dict]:
+        with self._lock:
+            turns = self._conversations.get(conversation_id)
+            if turns is None:
+                return []
+            self._conversations.move_to_end(conversation_id)
+            return [message for turn in turns for message in turn]
+
+    def append_turn(self, conversation_id: str, messages: List[dict]):
+        with self._lock:
+            turns = self._conversations.setdefault(conversation_id, [])
+            turns.append(list(messages))
+            del turns[: -self.max_turns]
+            self._conversations.move_to_end(conversation_id)
+            # The least recently active conversations are evicted first.
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+    def clear(self, conversation_id: str):
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
@@ -0,0 +1,36 @@
+import os
+import threading
+
+from .conversation_store import ConversationStore, MemoryConversationStore
+from .sqlite_conversation_store import SqliteConversationStore
+
+CONVERSATION_STORE = os.environ.get("CONVERSATION_STORE", "memory").lower()
+CONVERSATION_DB_PATH = os.environ.get("CONVERSATION_DB_PATH", "./data/conversations.sqlite3")
+CONVERSATION_MAX_TURNS = int(os.environ.get("CONVERSATION_MAX_TURNS", 10))
+CONVERSATION_MAX_THREADS = int(os.environ.get("CONVERSATION_MAX_THREADS", 500))
+
+_store = None
+_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    global _store
+    with _lock:
+        if _store is None:
+            limits = {"max_turns": CONVERSATION_MAX_TURNS, "max_conversations": CONVERSATION_MAX_THREADS}
+            if CONVERSATION_STORE == "sqlite":
+                _store = SqliteConversationStore(path=CONVERSATION_DB_PATH, **limits)
+            elif CONVERSATION_STORE == "memory":
+                _store = MemoryConversationStore(**limits)
+            else:
+                raise ValueError(f"Unknown conversation store: {CONVERSATION_STORE}")
+        return _store
+
+
+def conversation_key(user_id: str, channel_id: str = None, thread_ts: str = None) -> str:
+    # One history per Slack thread; outside threads (slash commands, workflows) per user.
+    if channel_id and thread_ts:
+        return f"{channel_id}:{thread_ts}"
+    if channel_id:
+        return f"{channel_id}:{user_id}"
+    return f"user:{user_id}"
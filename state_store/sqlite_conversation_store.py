@@ -0,0 +1,67 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+from .conversation_store import MemoryConversationStore
+
+
+class SqliteConversationStore(MemoryConversationStore):
+    """
+    Persists conversation turns in SQLite so history survives restarts. The in-memory LRU of the
+    parent class stays in front of it, so active threads never hit the database on reads.
+    """
+
+    def __init__(self, *, path: str = "./data/conversations.sqlite3", max_turns: int = 10, max_conversations: int = 500):
+        super().__init__(max_turns=max_turns, max_conversations=max_conversations)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        with self._db_lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "conversation_id TEXT NOT NULL, created_at REAL NOT NULL, messages TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS turns_by_conversation ON turns (conversation_id, created_at)"
+            )
+
+    def get_history(self, conversation_id: str) -> List[dict]:
+        with self._lock:
+            cached = conversation_id in self._conversations
+        if not cached:
+            with self._db_lock:
+                rows = self._connection.execute(
+                    "SELECT messages FROM turns WHERE conversation_id = ? ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                    (conversation_id, self.max_turns),
+                ).fetchall()
+            if not rows:
+                return []
+            with self._lock:
+                self._conversations[conversation_id] = [json.loads(messages) for (messages,) in reversed(rows)]
+                while len(self._conversations) > self.max_conversations:
+                    self._conversations.popitem(last=False)
+        return super().get_history(conversation_id)
+
+    def append_turn(self, conversation_id: str, messages: List[dict]):
+        # Load the stored window first, so the cached copy does not start from an empty history.
+        self.get_history(conversation_id)
+        super().append_turn(conversation_id, messages)
+        with self._db_lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO turns (conversation_id, created_at, messages) VALUES (?, ?, ?)",
+                (conversation_id, time.time(), json.dumps(messages)),
+            )
+            # Only the last `max_turns` turns are ever read back.
+            self._connection.execute(
+                "DELETE FROM turns WHERE conversation_id = ? AND rowid NOT IN ("
+                "SELECT rowid FROM turns WHERE conversation_id = ? ORDER BY created_at DESC, rowid DESC LIMIT ?)",
+                (conversation_id, conversation_id, self.max_turns),
+            )
+
+    def clear(self, conversation_id: str):
+        super().clear(conversation_id)
+        with self._db_lock, self._connection:
+            self._connection.execute("DELETE FROM turns WHERE conversation_id = ?", (conversation_id,))
@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import textwrap
+import argparse
+import tempfile
+import platform
+from contextlib import contextmanager, redirect_stdout
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from ai.tools import rag
+
+"""
+Offline benchmark for the RAG pipeline. Builds a synthetic corpus, embeds it with a deterministic
+hashing embedder and answers with a fake chat model, so it runs without an Ollama server.
+Reports PDF parse time per worker count, ingestion throughput, retrieval p50/p95/p99 latency and
+recall@k per backend and corpus size.
+
+    python tests/bench_rag.py --sizes 1000 10000 --out bench_results.json
+    python -m pytest tests/bench_rag.py   # quick smoke run
+"""
+
+VOCABULARY_SIZE = 5000
+WORDS_PER_CHUNK = 80
+QUERY_WORDS = 8
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words feature hashing, a stand-in for nomic-embed-text."""
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+
+    def _embed(self, text: str):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in text.lower().split():
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def make_corpus(size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # Zipf-distributed words make some terms common and most rare, like real documentation.
+    words = np.minimum(rng.zipf(1.3, size=(size, WORDS_PER_CHUNK)), VOCABULARY_SIZE)
+    chunks = []
+    for position, row in enumerate(words):
+        text = " ".join(f"term{word}" for word in row) + f" ERR-{position}"
+        source = f"data/knowledge/doc{position // 50}.pdf"
+        chunks.append(Document(page_content=text, metadata={"source": source, "page": (position // 5) % 10}))
+    return rag.calculate_chunk_ids(chunks)
+
+
+def write_pdf(path: str, pages):
+    # A minimal text-only PDF (one Helvetica font, one content stream per page), enough for PyPDFLoader.
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = " ".join(f"({line}) '" for line in textwrap.wrap(text, 95))
+        stream = f"BT /F1 9 Tf 11 TL 30 810 Td {lines} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(len(objects) + 1)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (len(objects))
+        )
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as file:
+        file.write(output)
+
+
+def write_corpus_pdfs(corpus, directory: str):
+    # One PDF per corpus source, one page per `page` metadata value, as make_corpus lays them out.
+    sources = {}
+    for chunk in corpus:
+        pages = sources.setdefault(os.path.basename(chunk.metadata["source"]), {})
+        pages.setdefault(chunk.metadata["page"], []).append(chunk.page_content)
+    paths = []
+    for name, pages in sources.items():
+        paths.append(os.path.join(directory, name))
+        write_pdf(paths[-1], ["\n".join(pages[page]) for page in sorted(pages)])
+    return paths
+
+
+def measure_parsing(corpus, directory: str, workers):
+    paths = write_corpus_pdfs(corpus, directory)
+    results = []
+    for count in workers:
+        started = time.perf_counter()
+        chunks = sum(rag.iter_file_chunks(paths, count), [])
+        elapsed = time.perf_counter() - started
+        results.append({"stage": "parse", "workers": count, "files": len(paths), "chunks": len(chunks), "seconds": elapsed})
+    return results
+
+
+def make_queries(corpus, count: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for position in rng.choice(len(corpus), size=min(count, len(corpus)), replace=False):
+        # The rarest words of a chunk are what a user would type to find it.
+        tokens = sorted(set(corpus[position].page_content.split()[:-1]), key=lambda token: -int(token[4:]))
+        queries.append((" ".join(tokens[:QUERY_WORDS]), corpus[position].metadata["id"]))
+    return queries
+
+
+def percentiles(latencies):
+    values = np.asarray(latencies) * 1000
+    return {f"p{p}_ms": float(np.percentile(values, p)) for p in (50, 95, 99)}
+
+
+@contextmanager
+def offline_rag(directory: str, embeddings: Embeddings):
+    # Points every rag.py path at a scratch directory and swaps Ollama for the local stand-ins.
+    overrides = {
+        "CHROMA_PATH": os.path.join(directory, "vectorDB"),
+        "MANIFEST_PATH": os.path.join(directory, "vectorDB", "ingest_manifest.json"),
+        "LEXICAL_INDEX_PATH": os.path.join(directory, "vectorDB", "lexical_index.json.gz"),
+        "SNAPSHOT_PATH": os.path.join(directory, "snapshot"),
+        "FAISS_INDEX_PATH": os.path.join(directory, "faiss"),
+        "IS_USING_IMAGE_RUNTIME": False,
+        "VECTOR_STORE_BACKEND": "chroma",
+        "get_embedding_function": lambda: embeddings,
+        "get_chat_model": lambda *args, **kwargs: FakeListChatModel(responses=["Respuesta de prueba."]),
+    }
+    previous = {name: getattr(rag, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(rag, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(rag, name, value)
+        reset_rag_state()
+
+
+def reset_rag_state():
+    rag.CHROMA_DB_INSTANCE = None
+    rag.LEXICAL_INDEX_INSTANCE = None
+    rag.QUERY_EMBEDDING_CACHE.clear()
+    rag.ANSWER_CACHE.clear()
+
+
+def open_backend(backend: str):
+    reset_rag_state()
+    rag.VECTOR_STORE_BACKEND = backend
+    return rag.get_db()
+
+
+def measure_retrieval(db, queries, exact_vectors, exact_ids, embeddings, k: int):
+    latencies, recall, hits = [], 0.0, 0
+    for query, target_id in queries:
+        started = time.perf_counter()
+        results = db.similarity_search_with_score(query, k=k)
+        latencies.append(time.perf_counter() - started)
+
+        found = [doc.metadata.get("id") for doc, _score in results]
+        scores = exact_vectors @ np.asarray(embeddings.embed_query(query), dtype=np.float32)
+        expected = {exact_ids[position] for position in np.argsort(-scores)[:k]}
+        recall += len(expected & set(found)) / k
+        hits += target_id in found
+    return {**percentiles(latencies), f"recall@{k}": recall / len(queries), f"hit@{k}": hits / len(queries)}
+
+
+def benchmark_size(size: int, query_count: int, k: int, backends, batch_size: int, workers=(1,)):
+    embeddings = HashingEmbeddings()
+    corpus = make_corpus(size)
+    queries = make_queries(corpus, query_count)
+    exact_ids = [chunk.metadata["id"] for chunk in corpus]
+    exact_vectors = np.asarray(embeddings.embed_documents([chunk.page_content for chunk in corpus]), dtype=np.float32)
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory, offline_rag(directory, embeddings):
+        results.extend({**row, "size": size} for row in measure_parsing(corpus, directory, workers))
+
+        started = time.perf_counter()
+        rag.add_to_chroma(iter(corpus), batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        results.append({"stage": "ingestion", "size": size, "seconds": elapsed, "chunks_per_sec": size / elapsed})
+
+        for backend in backends:
+            if backend.startswith("snapshot"):
+                precision = backend.split("-", 1)[1] if "-" in backend else "float32"
+                rag.export_vector_snapshot(precision)
+                db = open_backend("snapshot")
+            elif backend.startswith("faiss"):
+                rag.export_faiss_index(backend.split("-", 1)[1] if "-" in backend else "flat")
+                db = open_backend("faiss")
+            else:
+                db = open_backend(backend)
+            row = measure_retrieval(db, queries, exact_vectors, exact_ids, embeddings, k)
+            results.append({"stage": "retrieval", "backend": backend, "size": size, "k": k, **row})
+
+        open_backend("chroma")
+        latencies = []
+        for query, _target_id in queries:
+            started = time.perf_counter()
+            rag.query_rag(query)
+            latencies.append(time.perf_counter() - started)
+        results.append({"stage": "query_rag", "backend": "chroma", "size": size, **percentiles(latencies)})
+
+    return results
+
+
+def run(sizes, query_count: int = 100, k: int = 10, backends=("chroma", "snapshot"), batch_size: int = 256, workers=(1,)):
+    results = []
+    for size in sizes:
+        results.extend(benchmark_size(size, query_count, k, backends, batch_size, workers))
+    return {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+
+
+def test_rag_benchmark_smoke():
+    report = run([200], query_count=10, k=5, backends=("chroma", "snapshot-int8"), workers=(1, 2))
+    stages = {row["stage"] for row in report["results"]}
+    assert stages == {"ingestion", "retrieval", "query_rag", "parse"}
+    for row in report["results"]:
+        if row["stage"] == "retrieval":
+            assert row["recall@5"] >= 0.8
+        if row["stage"] == "parse":
+            assert row["files"] == 4 and row["chunks"] >= 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAG benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["chroma", "snapshot", "snapshot-int8", "faiss-flat", "faiss-hnsw"],
+        help="chroma, snapshot[-float16|-int8], faiss[-flat|-ivf|-hnsw]",
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, os.cpu_count() or 1],
+        help="Process counts to time PDF parsing and splitting with.",
+    )
+    parser.add_argument("--out", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    # rag.py progress output goes to stderr so stdout stays valid JSON.
+    with redirect_stdout(sys.stderr):
+        report = run(args.sizes, args.queries, args.k, args.backends, args.batch_size, args.workers)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
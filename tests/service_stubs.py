@@ -0,0 +1,31 @@
+import sys
+import types
+
+"""
+Stand-ins for the Trello and GitHub connection modules, which contact both services at import time.
+Tests that import the provider package (and with it the router and warm-up) call `install()` first.
+"""
+
+TRELLO_TOOLS = (
+    "get_trello_board_info",
+    "get_list_cards",
+    "add_card_to_list",
+    "delete_card",
+    "search_card_descriptions",
+    "get_latest_card",
+)
+GITHUB_TOOLS = ("list_user_repos", "print_repo_contents", "list_branches", "show_commit_history")
+
+
+def _module(name: str, functions) -> types.ModuleType:
+    module = types.ModuleType(name)
+    for function in functions:
+        setattr(module, function, lambda **kwargs: "")
+    return module
+
+
+def install():
+    github = _module("ai.tools.github_connection", GITHUB_TOOLS)
+    github.get_github_instance = lambda: types.SimpleNamespace(get_user=lambda: None)
+    sys.modules.setdefault("ai.tools.trello_connection", _module("ai.tools.trello_connection", TRELLO_TOOLS))
+    sys.modules.setdefault("ai.tools.github_connection", github)
@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.tools import answer_cache, rag
+from ai.tools.answer_cache import AnswerCache
+from ai.tools.ingest_manifest import IngestManifest
+
+SOURCES = ["doc.pdf:0:0", "doc.pdf:0:1"]
+
+
+def test_similar_question_with_same_sources_hits():
+    cache = AnswerCache(lambda: 1, similarity_threshold=0.95)
+    cache.put(SOURCES, [1.0, 0.0], "respuesta")
+
+    # Source order does not matter, the vector only has to be close enough.
+    assert cache.get(list(reversed(SOURCES)), [0.99, 0.05]) == "respuesta"
+    assert cache.get(SOURCES, [0.5, 0.5]) is None
+    assert cache.get(SOURCES[:1], [1.0, 0.0]) is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = AnswerCache(lambda: 1, ttl_seconds=60)
+    cache.put(SOURCES, [1.0, 0.0], "respuesta")
+
+    now[0] += 59
+    assert cache.get(SOURCES, [1.0, 0.0]) == "respuesta"
+    now[0] += 2
+    assert cache.get(SOURCES, [1.0, 0.0]) is None
+
+
+def test_new_manifest_generation_drops_every_answer(tmp_path, monkeypatch):
+    manifest_path = str(tmp_path / "manifest.json")
+    monkeypatch.setattr(rag, "MANIFEST_PATH", manifest_path)
+    monkeypatch.setitem(rag.STORE_VERSION, "mtime", None)
+    manifest = IngestManifest.load(manifest_path)
+    manifest.save()
+    cache = AnswerCache(rag.get_store_version)
+    cache.put(SOURCES, [1.0, 0.0], "respuesta")
+    assert cache.get(SOURCES, [1.0, 0.0]) == "respuesta"
+
+    # Re-ingestion bumps the generation; the mtime is moved explicitly for coarse filesystem clocks.
+    manifest.save()
+    stat = os.stat(manifest_path)
+    os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get(SOURCES, [1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+    # An unchanged manifest keeps new entries.
+    cache.put(SOURCES, [1.0, 0.0], "respuesta nueva")
+    manifest.save(bump_generation=False)
+    assert cache.get(SOURCES, [1.0, 0.0]) == "respuesta nueva"
@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.backend_pool import BackendPool, parse_backends
+
+
+def test_parse_backends_defaults_to_single_url():
+    assert [backend.url for backend in parse_backends("", "http://localhost:11434/")] == ["http://localhost:11434"]
+    backends = parse_backends("http://gpu-1:11434|2, http://gpu-2:11434", "http://localhost:11434")
+    assert [(backend.name, backend.max_concurrency) for backend in backends] == [("gpu-1:11434", 2), ("gpu-2:11434", 8)]
+
+
+def test_pool_routes_to_least_outstanding_and_ejects_failing_backends():
+    pool = BackendPool(parse_backends("http://a:1|2,http://b:1|2", ""), health_interval=0)
+    first, second = pool.checkout(), pool.checkout()
+    assert {first.name, second.name} == {"a:1", "b:1"}
+    pool.checkout(), pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.05)
+
+    # A waiter is woken up as soon as a slot is released.
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.checkout(timeout=2)))
+    waiter.start()
+    pool.release(first, 0.1)
+    waiter.join()
+    assert got == [first]
+
+    for backend in pool.backends:
+        while backend.outstanding:
+            pool.release(backend, 0.1)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            with pool.acquire(exclude=[pool.backends[1]]):
+                raise ConnectionError("refused")
+    assert pool.backends[0].ejected
+    assert all(pool.checkout() is pool.backends[1] for _ in range(2))
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.context_assembler import assemble_messages
+
+
+def _history(turns):
+    history = []
+    for number in range(turns):
+        history += [
+            {"role": "user", "content": f"question {number} " + "word " * 100},
+            {"role": "assistant", "content": f"answer {number} " + "text " * 100},
+        ]
+    return history
+
+
+def test_assembler_keeps_everything_that_fits():
+    context = [{"user": "U1", "text": "hola"}, {"user": "U2", "text": "adios"}]
+    assembled = assemble_messages("system", "prompt", _history(2), context, budget=5000)
+    roles = [message["role"] for message in assembled.messages]
+    assert roles == ["system", "system", "user", "assistant", "user", "assistant", "user"]
+    assert "<@U2>: adios" in assembled.messages[1]["content"]
+    assert assembled.dropped_turns == 0
+
+
+def test_assembler_stays_under_budget_and_summarizes_older_turns():
+    tool = {"role": "tool", "tool_call_id": "1", "name": "get_list_cards", "content": "card " * 5000}
+    assembled = assemble_messages("system", "prompt", _history(10), budget=1500, tool_messages=[tool])
+    assert assembled.total <= 1500
+    assert assembled.dropped_turns > 0
+    assert assembled.messages[0]["role"] == "system"
+    assert assembled.messages[1]["content"].startswith("Summary of earlier turns")
+    assert assembled.messages[-2] == {"role": "user", "content": "prompt"}
+    assert assembled.messages[-1]["content"] != tool["content"]
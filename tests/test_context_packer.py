@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+from langchain_core.documents import Document
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai import tokens
+from ai.tools.context_packer import pack_context
+
+TEXT = "El despliegue usa Docker y variables de entorno para configurar Ollama y Slack. "
+
+
+def _result(chunk_id, text):
+    return Document(page_content=text, metadata={"id": chunk_id}), 0.5
+
+
+def test_neighbouring_chunks_of_a_page_are_merged():
+    results = [_result("a.pdf:1:0", "primera parte"), _result("b.pdf:3:2", "otra"), _result("a.pdf:1:1", "segunda parte")]
+    packed = pack_context(results, budget=500)
+    assert packed.text.split("\n\n---\n\n") == ["[a.pdf:1]\nprimera parte segunda parte", "[b.pdf:3]\notra"]
+    assert packed.chunk_ids == ["a.pdf:1:0", "a.pdf:1:1", "b.pdf:3:2"]
+    assert not packed.truncated
+
+
+def test_packed_context_stays_within_budget():
+    results = [_result(f"doc{page}.pdf:{page}:0", TEXT * 20) for page in range(5)]
+    packed = pack_context(results, budget=300)
+    assert packed.truncated
+    assert packed.tokens <= 300
+    assert tokens.count_tokens(packed.text) <= 300
+
+
+def test_estimate_is_close_to_tiktoken(monkeypatch):
+    # Words are counted in pieces of up to four characters, punctuation on its own.
+    assert tokens._ESTIMATOR.encode("Hola, despliegue.") == ["Hola", ",", "desp", "lieg", "ue", "."]
+    estimate = len(tokens._ESTIMATOR.encode(TEXT * 10))
+
+    monkeypatch.setattr(tokens, "_tokenizer", None)
+    if not tokens.load_tokenizer():
+        pytest.skip("the tiktoken encoding is not available offline")
+    try:
+        # Prompt budgets are set with some headroom, the estimate only has to be in the same range.
+        exact = tokens.count_tokens(TEXT * 10)
+        assert 0.7 * exact <= estimate <= 1.5 * exact
+    finally:
+        tokens.count_tokens.cache_clear()
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_store.conversation_store import MemoryConversationStore
+from state_store.sqlite_conversation_store import SqliteConversationStore
+
+
+def _turn(number):
+    return [{"role": "user", "content": f"q{number}"}, {"role": "assistant", "content": f"a{number}"}]
+
+
+def test_memory_conversation_store_windows_and_evicts():
+    store = MemoryConversationStore(max_turns=2, max_conversations=2)
+    for number in range(3):
+        store.append_turn("C1:1", _turn(number))
+    assert [message["content"] for message in store.get_history("C1:1")] == ["q1", "a1", "q2", "a2"]
+
+    store.append_turn("C1:2", _turn(0))
+    store.get_history("C1:1")
+    store.append_turn("C1:3", _turn(0))
+    assert store.get_history("C1:2") == []
+    assert store.get_history("C1:1")
+
+
+def test_sqlite_conversation_store_persists(tmp_path):
+    path = str(tmp_path / "conversations.sqlite3")
+    store = SqliteConversationStore(path=path, max_turns=2)
+    for number in range(3):
+        store.append_turn("C1:1", _turn(number))
+
+    reopened = SqliteConversationStore(path=path, max_turns=2)
+    assert [message["content"] for message in reopened.get_history("C1:1")] == ["q1", "a1", "q2", "a2"]
+    reopened.clear("C1:1")
+    assert SqliteConversationStore(path=path, max_turns=2).get_history("C1:1") == []
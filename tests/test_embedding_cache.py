@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.tools.embedding_cache import CachedQueryEmbeddings, QueryEmbeddingCache, normalize_query
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return [float(len(text))]
+
+
+def test_queries_are_normalized_before_lookup():
+    assert normalize_query("  ¿Cómo   despliego\n el BOT? ") == "¿cómo despliego el bot?"
+    embeddings = CountingEmbeddings()
+    cached = CachedQueryEmbeddings(embeddings, QueryEmbeddingCache("model"))
+    assert cached.embed_query("Deploy  the bot") == cached.embed_query("deploy the BOT ")
+    assert embeddings.calls == ["Deploy  the bot"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache("model", max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0] and cache.get("c") == [3.0]
+
+
+def test_persisted_entries_round_trip_for_the_same_model_only(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = QueryEmbeddingCache("model", persist_path=path)
+    for position in range(5):
+        cache.put(f"query {position}", [float(position)])
+    cache.save()
+
+    reloaded = QueryEmbeddingCache("model", max_entries=3, persist_path=path)
+    assert [reloaded.get(f"query {position}") for position in range(5)] == [None, None, [2.0], [3.0], [4.0]]
+    assert QueryEmbeddingCache("other-model", persist_path=path).get("query 4") is None
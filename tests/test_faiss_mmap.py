@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.tools.vector_stores import FAISS_INDEX_TYPES, FaissVectorStore, build_faiss_index
+
+pytest.importorskip("faiss")
+
+
+class FakeChroma:
+    """Just enough of `Chroma.get` for `iter_chroma_records`."""
+
+    def __init__(self, count: int, dimension: int = 16):
+        self.vectors = np.random.default_rng(0).normal(size=(count, dimension)).astype(np.float32)
+
+    def get(self, limit, offset, include):
+        stop = min(offset + limit, len(self.vectors))
+        page = range(offset, stop)
+        return {
+            "ids": [f"doc:{position}" for position in page],
+            "embeddings": self.vectors[offset:stop],
+            "documents": [f"text {position}" for position in page],
+            "metadatas": [{"position": position} for position in page],
+        }
+
+
+def mapped_files():
+    with open("/proc/self/maps") as file:
+        return {line.split()[-1] for line in file if len(line.split()) >= 6}
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc/self/maps")
+@pytest.mark.parametrize("index_type", FAISS_INDEX_TYPES)
+def test_faiss_index_is_memory_mapped(tmp_path, index_type):
+    directory = str(tmp_path / index_type)
+    build_faiss_index(FakeChroma(500), directory, index_type)
+
+    store = FaissVectorStore(directory, None)
+    assert store.load_mode != "read"
+    assert os.path.join(store.directory, FaissVectorStore.INDEX_FILE) in mapped_files()
+    assert store.get(ids=["doc:7"], include=["embeddings"])["ids"] == ["doc:7"]
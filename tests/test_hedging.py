@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.hedging import run_hedged
+
+
+class FakeStream:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def fake_completion(first_token_delay, tokens, label):
+    def run(emit, cancel_token):
+        stream = FakeStream()
+        cancel_token.attach(stream)
+        started = time.perf_counter()
+        while time.perf_counter() - started < first_token_delay:
+            if stream.closed:
+                return None
+            time.sleep(0.01)
+        for token in tokens:
+            emit(token)
+        return label
+
+    return run
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    tokens = []
+    primary = fake_completion(2, ["slow"], "primary")
+    result = run_hedged(primary, fake_completion(0, ["fa", "st"], "secondary"), tokens.append, 0.1)
+    assert result == "secondary"
+    assert tokens == ["fa", "st"]
+
+
+def test_fast_primary_does_not_hedge():
+    tokens = []
+    result = run_hedged(fake_completion(0, ["ok"], "primary"), fake_completion(0, ["no"], "secondary"), tokens.append, 1)
+    assert result == "primary"
+    assert tokens == ["ok"]
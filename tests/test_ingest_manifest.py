@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+
+from ai.tools.ingest_manifest import IngestManifest
+from tests.bench_rag import HashingEmbeddings, offline_rag, open_backend
+from ai.tools import rag
+
+
+def _write(path, content):
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def test_ingest_manifest_plan(tmp_path):
+    source = str(tmp_path / "doc.pdf")
+    manifest_path = str(tmp_path / "manifest.json")
+    _write(source, "first version")
+
+    manifest = IngestManifest.load(manifest_path)
+    assert manifest.plan([source]).new == [source]
+    manifest.record(source, [f"{source}:0:0", f"{source}:0:1"])
+    manifest.save()
+
+    manifest = IngestManifest.load(manifest_path)
+    assert manifest.generation == 1
+    assert manifest.plan([source]).unchanged == [source]
+
+    _write(source, "second, longer version")
+    plan = manifest.plan([source])
+    assert plan.changed == [source]
+    assert plan.stale_chunk_ids == [f"{source}:0:0", f"{source}:0:1"]
+
+    plan = manifest.plan([])
+    assert plan.deleted == [source]
+    assert plan.to_ingest == []
+
+
+def test_reingested_chunks_replace_existing_text(tmp_path):
+    # Without a manifest an edited file is ingested again under the same chunk IDs.
+    with offline_rag(str(tmp_path), HashingEmbeddings()):
+        for text in ("old text", "new text"):
+            rag.add_to_chroma(
+                rag.calculate_chunk_ids([Document(page_content=text, metadata={"source": "a.pdf", "page": 0})])
+            )
+        assert open_backend("chroma").get(ids=["a.pdf:0:0"])["documents"] == ["new text"]
+        assert rag.LexicalIndex.load(rag.LEXICAL_INDEX_PATH).search("new")[0][0] == "a.pdf:0:0"
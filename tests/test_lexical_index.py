@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+from langchain_core.documents import Document
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.tools import rag
+from ai.tools.ingest_manifest import IngestManifest
+from tests.bench_rag import HashingEmbeddings, offline_rag
+
+
+def _ingest(text, source):
+    rag.add_to_chroma(rag.calculate_chunk_ids([Document(page_content=text, metadata={"source": source, "page": 0})]))
+
+
+def _bump_generation(manifest):
+    # The mtime is moved explicitly so coarse filesystem clocks still register the change.
+    manifest.save()
+    stat = os.stat(rag.MANIFEST_PATH)
+    os.utime(rag.MANIFEST_PATH, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_missing_lexical_index_is_rebuilt_from_the_vector_db(tmp_path):
+    with offline_rag(str(tmp_path), HashingEmbeddings()):
+        _ingest("configuración", "a.pdf")
+        os.remove(rag.LEXICAL_INDEX_PATH)
+        rag.rebuild_lexical_index()
+        assert rag.LexicalIndex.load(rag.LEXICAL_INDEX_PATH).search("Configuración")[0][0] == "a.pdf:0:0"
+
+
+def test_lexical_index_is_reloaded_after_a_new_generation(tmp_path, monkeypatch):
+    with offline_rag(str(tmp_path), HashingEmbeddings()):
+        monkeypatch.setitem(rag.STORE_VERSION, "mtime", None)
+        manifest = IngestManifest.load(rag.MANIFEST_PATH)
+        _ingest("despliegue con docker", "a.pdf")
+        _bump_generation(manifest)
+        assert rag.get_lexical_index().search("kubernetes") == []
+
+        _ingest("despliegue con kubernetes", "b.pdf")
+        _bump_generation(manifest)
+        # The running bot keeps answering from the old index until the new one is parsed.
+        rag.get_lexical_index()
+        deadline = time.monotonic() + 5
+        while rag.LEXICAL_INDEX_VERSION["generation"] != manifest.generation and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert rag.get_lexical_index().search("kubernetes")[0][0] == "b.pdf:0:0"
@@ -0,0 +1,32 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import service_stubs
+
+service_stubs.install()
+
+from ai.providers.openai import OpenAI_API
+
+
+def _delta(index, call_id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def test_streamed_tool_call_deltas_are_merged_per_index():
+    calls = {}
+    chunks = [
+        [_delta(0, "call_1", "get_list_cards", '{"list_')],
+        [_delta(0, arguments='id": "Done"}'), _delta(1, "call_2", "list_branches", "")],
+        [_delta(1, arguments='{"repo_name": "bot"}')],
+        None,
+    ]
+    for chunk in chunks:
+        OpenAI_API._collect_tool_calls(calls, chunk)
+
+    assert calls == {
+        0: {"id": "call_1", "name": "get_list_cards", "arguments": '{"list_id": "Done"}'},
+        1: {"id": "call_2", "name": "list_branches", "arguments": '{"repo_name": "bot"}'},
+    }
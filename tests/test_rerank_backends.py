@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.bench_rag import HashingEmbeddings, make_corpus, offline_rag, open_backend
+from ai.tools import rag
+
+BACKENDS = ["chroma", "snapshot", "snapshot-int8", "faiss-flat", "faiss-ivf", "faiss-hnsw"]
+
+
+@pytest.fixture(scope="module")
+def ingested():
+    with tempfile.TemporaryDirectory() as directory, offline_rag(directory, HashingEmbeddings()):
+        rag.add_to_chroma(iter(make_corpus(200)))
+        yield
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_every_backend_reranks_candidates(ingested, backend, monkeypatch):
+    if backend.startswith("faiss"):
+        pytest.importorskip("faiss")
+        rag.export_faiss_index(backend.split("-", 1)[1])
+        db = open_backend("faiss")
+    elif backend.startswith("snapshot"):
+        rag.export_vector_snapshot(backend.split("-", 1)[1] if "-" in backend else "float32")
+        db = open_backend("snapshot")
+    else:
+        db = open_backend(backend)
+
+    results = db.similarity_search_with_score("term1 term2 term3", k=5)
+    vectors = rag.get_candidate_vectors(db, results)
+    assert vectors is not None and len(vectors) == len(results) == 5
+
+    reranked = []
+    rerank = rag.rerank
+    monkeypatch.setattr(rag, "rerank", lambda *args, **kwargs: reranked.append(True) or rerank(*args, **kwargs))
+    query_vector = HashingEmbeddings().embed_query("term1 term2 term3")
+    assert len(rag.retrieve(db, "term1 term2 term3", query_vector, k=3)) == 3
+    assert reranked
@@ -0,0 +1,62 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import service_stubs
+
+service_stubs.install()
+
+from ai.providers import openai as provider
+from ai.providers import router
+
+
+def test_app_home_selection_is_honoured_only_for_offered_models(monkeypatch):
+    monkeypatch.setattr(router, "OLLAMA_CHAT_MODEL", "llama3.2")
+    monkeypatch.setattr(router, "ANSWER_MODELS", ["llama3.2", "qwen2.5:14b"])
+    states = {"U1": ("openai", "qwen2.5:14b"), "U2": ("openai", "mistral"), "U3": ("anthropic", "qwen2.5:14b")}
+
+    def get_user_state(user_id, is_app_home):
+        if user_id not in states:
+            raise FileNotFoundError(user_id)
+        return states[user_id]
+
+    monkeypatch.setattr(router, "get_user_state", get_user_state)
+    assert router.resolve_answer_model("U1") == "qwen2.5:14b"
+    assert router.resolve_answer_model("U2") == "llama3.2"
+    assert router.resolve_answer_model("U3") == "llama3.2"
+    assert router.resolve_answer_model("U4") == "llama3.2"
+    assert router.resolve_answer_model(None) == "llama3.2"
+
+
+def _fake_complete(completions, tool_calls):
+    def complete(messages, on_token=None, model=None, **kwargs):
+        completions.append((model, "tools" in kwargs))
+        if "tools" in kwargs and tool_calls:
+            return "", tool_calls
+        return f"answer from {model}", None
+
+    return complete
+
+
+def test_router_model_picks_tools_and_answer_model_replies(monkeypatch):
+    completions = []
+    tool_call = SimpleNamespace(id="1", function=SimpleNamespace(name="get_list_cards", arguments='{"list_id": "Done"}'))
+    api = provider.OpenAI_API.__new__(provider.OpenAI_API)
+    api._complete = _fake_complete(completions, [tool_call])
+    monkeypatch.setattr(provider, "TOOL_ROUTER_MODEL", "llama3.2:1b")
+    monkeypatch.setattr(provider, "run_tool_calls", lambda calls, functions: [])
+
+    assert api._answer("¿qué hay en Done?", "system", [], None, None, "qwen2.5:14b") == "answer from qwen2.5:14b"
+    assert completions == [("llama3.2:1b", True), ("qwen2.5:14b", False)]
+
+
+def test_without_router_the_answer_model_does_both(monkeypatch):
+    completions = []
+    api = provider.OpenAI_API.__new__(provider.OpenAI_API)
+    api._complete = _fake_complete(completions, None)
+    monkeypatch.setattr(provider, "TOOL_ROUTER_MODEL", "")
+
+    assert api._answer("hola", "system", [], None, None, "qwen2.5:14b") == "answer from qwen2.5:14b"
+    assert completions == [("qwen2.5:14b", True)]
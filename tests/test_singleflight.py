@@ -0,0 +1,56 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.singleflight import SingleFlight, request_key
+
+
+def _run_concurrently(flight, key, function, count):
+    results = [None] * count
+
+    def call(position):
+        results[position] = flight.do(key, function, position)
+
+    threads = [threading.Thread(target=call, args=(position,)) for position in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_calls_in_flight_share_one_execution():
+    flight, executions = SingleFlight("test"), []
+
+    def work(position):
+        executions.append(position)
+        time.sleep(0.2)
+        return f"answer {position}"
+
+    assert _run_concurrently(flight, "key", work, 4) == ["answer 0"] * 4
+    assert executions == [0]
+    assert flight.in_flight() == 0
+    # Nothing is cached once the flight lands.
+    assert flight.do("key", work, 9) == "answer 9"
+
+
+def test_unshared_flight_lets_waiters_run_their_own_call():
+    flight, executions = SingleFlight("test"), []
+
+    def write(position):
+        time.sleep(0.05)
+        executions.append(position)
+        flight.unshare()
+        time.sleep(0.2)
+        return f"card {position}"
+
+    assert _run_concurrently(flight, "create card", write, 3) == ["card 0", "card 1", "card 2"]
+    assert sorted(executions) == [0, 1, 2]
+
+
+def test_request_key_is_exact():
+    assert request_key("model", "Create card X") != request_key("model", "create card x")
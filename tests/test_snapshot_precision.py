@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.tools import vector_stores
+from ai.tools.vector_stores import SnapshotVectorStore, file_size, quantization_report, write_snapshot
+
+COUNT, DIMENSION = 400, 64
+
+
+def records(vectors):
+    ids = [f"doc:{position}" for position in range(len(vectors))]
+    yield ids, vectors, [f"text {doc_id}" for doc_id in ids], [{} for _ in ids]
+
+
+def directory_size(directory):
+    return sum(file_size(directory, name) for name in os.listdir(directory))
+
+
+def test_int8_snapshot_without_rescoring_is_smaller_and_still_searchable(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(COUNT, DIMENSION)).astype(np.float32)
+    write_snapshot(records(vectors), COUNT, str(tmp_path / "float32"))
+    write_snapshot(records(vectors), COUNT, str(tmp_path / "int8"), precision="int8", rescore=False)
+    assert directory_size(str(tmp_path / "int8")) < directory_size(str(tmp_path / "float32")) / 2
+
+    store = SnapshotVectorStore(str(tmp_path / "int8"), None)
+    assert store.vectors is None
+    positions, _scores = store.search(vectors[7], 1)
+    assert positions.tolist() == [7]
+    vector = store.get(ids=["doc:7"], include=["embeddings"])["embeddings"][0]
+    assert np.dot(vector, vectors[7]) / (np.linalg.norm(vector) * np.linalg.norm(vectors[7])) > 0.99
+
+
+def test_quantization_report_counts_the_rescoring_copy(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(COUNT, DIMENSION)).astype(np.float32)
+    write_snapshot(records(vectors), COUNT, str(tmp_path / "snapshot"))
+    report = quantization_report(str(tmp_path / "snapshot"), k=5, sample=20)
+    assert report["int8"]["disk_bytes"] < report["float16"]["disk_bytes"] < report["float32"]["disk_bytes"]
+    assert report["int8"]["disk_bytes_with_rescoring"] > report["float32"]["disk_bytes"]
+    assert report["int8"]["rescored"] >= report["int8"]["quantized_only"]
+
+
+def test_publishing_a_snapshot_swaps_the_whole_build(tmp_path):
+    directory = str(tmp_path / "snapshot")
+    vectors = np.random.default_rng(0).normal(size=(COUNT, DIMENSION)).astype(np.float32)
+    write_snapshot(records(vectors), COUNT, directory)
+    opened = SnapshotVectorStore(directory, None)
+
+    write_snapshot(records(vectors[:10]), 10, directory, precision="int8")
+    assert os.path.islink(directory)
+    # A store opened before the swap keeps reading its own build, the new one is complete.
+    assert len(opened.documents) == COUNT and opened.precision == "float32"
+    assert len(SnapshotVectorStore(directory, None).documents) == 10
+
+    write_snapshot(records(vectors[:5]), 5, directory)
+    builds = [name for name in os.listdir(tmp_path) if name.startswith("snapshot.")]
+    assert len(builds) == 2 and not os.path.exists(opened.directory)
+
+
+def test_snapshot_is_renamed_into_place_without_symlinks(tmp_path, monkeypatch):
+    def no_symlinks(*args, **kwargs):
+        raise OSError("symbolic links are not available")
+
+    monkeypatch.setattr(vector_stores.os, "symlink", no_symlinks)
+    directory = str(tmp_path / "snapshot")
+    vectors = np.random.default_rng(0).normal(size=(COUNT, DIMENSION)).astype(np.float32)
+    write_snapshot(records(vectors), COUNT, directory)
+    write_snapshot(records(vectors[:10]), 10, directory)
+    assert not os.path.islink(directory)
+    assert os.listdir(tmp_path) == ["snapshot"]
+    assert len(SnapshotVectorStore(directory, None).documents) == 10
@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slack_sdk.errors import SlackApiError
+
+from tests import service_stubs
+
+service_stubs.install()
+
+from listeners.listener_utils.stream_renderer import STREAM_CURSOR, ChannelThrottle, SlackStreamRenderer
+
+
+class FakeClient:
+    def __init__(self, rate_limited: int = 0):
+        self.updates = []
+        self.rate_limited = rate_limited
+        self._lock = threading.Lock()
+
+    def chat_update(self, channel, ts, text):
+        with self._lock:
+            if self.rate_limited:
+                self.rate_limited -= 1
+                raise SlackApiError("ratelimited", SimpleNamespace(status_code=429, headers={"Retry-After": "0.2"}))
+            self.updates.append((channel, ts, text, time.monotonic()))
+
+
+def test_tokens_are_coalesced_and_the_final_text_always_goes_out():
+    client = FakeClient()
+    renderer = SlackStreamRenderer(client, "C1", "1.0", throttle=ChannelThrottle(0.2))
+    for token in ["Ho", "la", " mun", "do"]:
+        renderer.append(token)
+        time.sleep(0.05)
+    renderer.finish("Hola mundo.")
+
+    texts = [text for _channel, _ts, text, _at in client.updates]
+    assert len(texts) < 4
+    assert texts[0].endswith(STREAM_CURSOR)
+    assert texts[-1] == "Hola mundo."
+
+
+def test_renderers_in_one_channel_share_the_update_rate():
+    client, throttle = FakeClient(), ChannelThrottle(0.1)
+    renderers = [SlackStreamRenderer(client, "C1", str(position), throttle=throttle) for position in range(3)]
+    for _ in range(5):
+        for renderer in renderers:
+            renderer.append("token ")
+        time.sleep(0.05)
+    for renderer in renderers:
+        renderer.finish()
+
+    times = sorted(at for _channel, _ts, _text, at in client.updates)
+    assert all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:]))
+    assert {ts for _channel, ts, text, _at in client.updates if text == "token " * 5} == {"0", "1", "2"}
+
+
+def test_rate_limited_final_update_is_retried_after_backoff():
+    client = FakeClient(rate_limited=1)
+    renderer = SlackStreamRenderer(client, "C2", "1.0", throttle=ChannelThrottle(0.01))
+    started = time.monotonic()
+    renderer.finish("Respuesta final")
+
+    assert [text for _channel, _ts, text, _at in client.updates] == ["Respuesta final"]
+    assert client.updates[0][3] - started >= 0.2
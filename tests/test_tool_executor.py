@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import threading
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.tools import tool_executor
+
+
+def _call(call_id, name, arguments="{}"):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def _wait_until_unstuck(seconds=2):
+    deadline = time.monotonic() + seconds
+    while tool_executor.stuck_calls() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_tool_calls_run_concurrently_in_order_with_timeouts(monkeypatch):
+    monkeypatch.setitem(tool_executor.TOOL_TIMEOUTS, "slow", 0.2)
+    functions = {
+        "echo": lambda value, delay: time.sleep(delay) or value,
+        "slow": lambda: time.sleep(1),
+    }
+    calls = [
+        _call("1", "echo", '{"value": "first", "delay": 0.15}'),
+        _call("2", "echo", '{"value": "second", "delay": 0.05}'),
+        _call("3", "slow"),
+        _call("4", "missing"),
+    ]
+
+    started = time.perf_counter()
+    messages = tool_executor.run_tool_calls(calls, functions)
+
+    assert time.perf_counter() - started < 0.5
+    assert [message["tool_call_id"] for message in messages] == ["1", "2", "3", "4"]
+    assert [message["content"] for message in messages[:2]] == ["first", "second"]
+    assert "tiempo límite" in messages[2]["content"]
+    assert "no existe" in messages[3]["content"]
+
+
+def test_read_results_are_cached_until_a_write_invalidates_them():
+    tool_executor.TOOL_RESULT_CACHE.clear()
+    fetches = []
+    functions = {
+        "get_list_cards": lambda list_id: fetches.append(list_id) or f"cards of {list_id}",
+        "add_card_to_list": lambda list_id, name: "Tarjeta creada",
+    }
+
+    tool_executor.run_tool_calls([_call("1", "get_list_cards", '{"list_id": "Done"}')], functions)
+    messages = tool_executor.run_tool_calls([_call("2", "get_list_cards", '{"list_id": " done"}')], functions)
+    assert messages[0]["content"] == "cards of Done"
+    assert fetches == ["Done"]
+
+    tool_executor.run_tool_calls([_call("3", "add_card_to_list", '{"list_id": "Done", "name": "x"}')], functions)
+    tool_executor.run_tool_calls([_call("4", "get_list_cards", '{"list_id": "Done"}')], functions)
+    assert fetches == ["Done", "Done"]
+
+
+def test_failures_are_not_cached_and_paths_keep_their_case():
+    tool_executor.TOOL_RESULT_CACHE.clear()
+    fetches = []
+    functions = {
+        "get_latest_card": lambda: fetches.append("latest") or {"success": False, "message": "sin conexión"},
+        "search_card_descriptions": lambda search_term: fetches.append(search_term) or [],
+        "print_repo_contents": lambda repo_name, path: fetches.append(path) or f"contents of {path}",
+    }
+
+    for call_id in ("1", "2"):
+        tool_executor.run_tool_calls([_call(call_id, "get_latest_card")], functions)
+        tool_executor.run_tool_calls([_call(call_id, "search_card_descriptions", '{"search_term": "login"}')], functions)
+    assert fetches == ["latest", "login", "latest", "login"]
+
+    tool_executor.run_tool_calls([_call("3", "print_repo_contents", '{"repo_name": "bot", "path": "Docs"}')], functions)
+    messages = tool_executor.run_tool_calls(
+        [_call("4", "print_repo_contents", '{"repo_name": "bot", "path": "docs"}')], functions
+    )
+    assert messages[0]["content"] == "contents of docs"
+
+
+def test_timed_out_writes_report_an_unknown_result_and_stuck_calls_refuse_new_ones(monkeypatch):
+    monkeypatch.setitem(tool_executor.TOOL_TIMEOUTS, "add_card_to_list", 0.1)
+    monkeypatch.setattr(tool_executor, "TOOL_MAX_STUCK", 1)
+    _wait_until_unstuck()
+    released = threading.Event()
+    ran = []
+    functions = {
+        "add_card_to_list": lambda list_id, name: released.wait() and "Tarjeta creada",
+        "get_latest_card": lambda: ran.append("latest") or "latest card",
+    }
+
+    try:
+        messages = tool_executor.run_tool_calls(
+            [_call("1", "add_card_to_list", '{"list_id": "Done", "name": "x"}')], functions
+        )
+        assert "resultado es desconocido" in messages[0]["content"]
+        assert tool_executor.stuck_calls() == 1
+
+        messages = tool_executor.run_tool_calls([_call("2", "get_latest_card")], functions)
+        assert "no se ejecutó" in messages[0]["content"]
+        assert ran == []
+    finally:
+        released.set()
+
+    _wait_until_unstuck()
+    tool_executor.TOOL_RESULT_CACHE.clear()
+    messages = tool_executor.run_tool_calls([_call("3", "get_latest_card")], functions)
+    assert messages[0]["content"] == "latest card"
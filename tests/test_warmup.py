@@ -0,0 +1,36 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import service_stubs
+
+service_stubs.install()
+
+from ai import warmup
+
+
+class FakeOllama:
+    def generate(self, model, prompt, keep_alive):
+        if model == "router-model":
+            raise RuntimeError(f"model '{model}' not found, try pulling it first")
+
+
+def test_failed_model_load_still_opens_the_store_and_marks_ready(monkeypatch):
+    opened = []
+    embeddings = SimpleNamespace(embed_query=lambda text: [1.0])
+    monkeypatch.setattr(warmup, "TOOL_ROUTER_MODEL", "router-model")
+    monkeypatch.setattr(warmup, "get_ollama_client", lambda url: FakeOllama())
+    monkeypatch.setattr(warmup, "get_embeddings", lambda model, url: embeddings)
+    monkeypatch.setattr(warmup.rag, "get_db", lambda: SimpleNamespace(embeddings=embeddings))
+    monkeypatch.setattr(warmup.rag, "search_for_query", lambda *args: opened.append(True))
+    monkeypatch.setattr(warmup.tokens, "load_tokenizer", lambda: False)
+
+    warmup.warm_up()
+
+    status = warmup.warmup_status()
+    assert warmup.is_ready() and status["degraded"]
+    assert opened and status["vector_store"] and status["embedding_model"]
+    assert not status["chat_model"]
+    assert len(status["errors"]) == 1 and "router-model" in status["errors"][0]